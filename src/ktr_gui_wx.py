@@ -318,6 +318,7 @@ class UnifiedFrame(wx.Frame):
         
         from wxktr_modules.task_manager import get_task_manager
         get_task_manager().shutdown(wait=False)
+        self.settings_manager.flush()
         
         self.Destroy()
 
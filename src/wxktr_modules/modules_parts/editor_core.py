@@ -38,6 +38,7 @@ class CodeEditor(AutoCompleteMixin, AutoIndentMixin, SmartLexerMixin, stc.Styled
         self.SetBackSpaceUnIndents(True)
         
         self._init_autocomplete()
+        self._init_smart_lexer()
         
         self.guess_and_set_lexer(self.filepath)
         
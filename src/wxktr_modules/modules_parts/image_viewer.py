@@ -1,15 +1,17 @@
 import wx
 import os
+import threading
 
 class ImageViewer(wx.Panel):
     """A panel that displays images with zoom and pan capabilities."""
     
-    SUPPORTED_FORMATS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.tif', '.tiff', '.webp'}
+    SUPPORTED_FORMATS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.tif', '.tiff', '.webp'})
     
     def __init__(self, parent):
         """Initializes the ImageViewer panel."""
         super().__init__(parent)
         self.current_image = None
+        self.current_bitmap = None
         self.image_path = None
         self.zoom_level = 1.0
         self.offset_x = 0
@@ -17,6 +19,11 @@ class ImageViewer(wx.Panel):
         self.dragging = False
         self.drag_start_x = 0
         self.drag_start_y = 0
+        self._loading = False
+        self._load_error = None
+        self._load_generation = 0
+        self._pending_motion = False
+        self._motion_old_rect = None
         
         self.SetBackgroundStyle(wx.BG_STYLE_PAINT)
         
@@ -33,32 +40,73 @@ class ImageViewer(wx.Panel):
         """Check if the file is a supported image format."""
         if not filepath:
             return False
-        ext = os.path.splitext(filepath)[1].lower()
-        return ext in cls.SUPPORTED_FORMATS
+        # Like os.path.splitext: dotfiles such as '.png' have no extension.
+        stem, _, ext = os.path.basename(filepath).rpartition('.')
+        return bool(stem.lstrip('.')) and ('.' + ext.lower()) in cls.SUPPORTED_FORMATS
     
     def load_image(self, filepath):
-        """Load an image from the specified file path."""
+        """
+        Load an image from the specified file path.
+
+        The path is validated up front and the decode runs on a background
+        thread. Returns False if the path is not a loadable image file,
+        True if decoding has been started.
+        """
         self.image_path = filepath
         self.zoom_level = 1.0
         self.offset_x = 0
         self.offset_y = 0
-        
+        self.current_image = None
+        self.current_bitmap = None
+        self._load_error = None
+        self._load_generation += 1
+
+        if not self.is_supported_image(filepath) or not os.path.isfile(filepath):
+            self._loading = False
+            self._load_error = f"Failed to load image: {filepath}"
+            self.Refresh()
+            return False
+
+        self._loading = True
+        self.Refresh()
+
+        generation = self._load_generation
+        thread = threading.Thread(target=self._decode_image_thread, args=(filepath, generation), daemon=True)
+        thread.start()
+        return True
+
+    def _decode_image_thread(self, filepath, generation):
+        """Decodes the image file off the UI thread and hands the result back."""
+        error = None
         try:
-            self.current_image = wx.Image(filepath, wx.BITMAP_TYPE_ANY)
-            if not self.current_image.IsOk():
-                self.current_image = None
-                wx.MessageBox(f"Failed to load image: {filepath}", "Error", wx.ICON_ERROR)
-            else:
-                self.fit_to_window()
+            image = wx.Image(filepath, wx.BITMAP_TYPE_ANY)
+            if not image.IsOk():
+                image = None
+                error = f"Failed to load image: {filepath}"
         except Exception as e:
-            self.current_image = None
-            wx.MessageBox(f"Error loading image: {e}", "Error", wx.ICON_ERROR)
-        
+            image = None
+            error = f"Error loading image: {e}"
+        wx.CallAfter(self._on_image_decoded, image, error, generation)
+
+    def _on_image_decoded(self, image, error, generation):
+        """Installs a decoded image on the main thread, ignoring stale loads."""
+        if not self or generation != self._load_generation:
+            return
+        self._loading = False
+        self.current_image = image
+        self.current_bitmap = wx.Bitmap(image) if image is not None else None
+        self._load_error = error
+        if image is not None:
+            self.fit_to_window()
         self.Refresh()
     
     def clear(self):
         """Clear the current image."""
         self.current_image = None
+        self.current_bitmap = None
+        self._loading = False
+        self._load_error = None
+        self._load_generation += 1
         self.image_path = None
         self.zoom_level = 1.0
         self.offset_x = 0
@@ -97,8 +145,14 @@ class ImageViewer(wx.Panel):
         dc.Clear()
         
         if not self.current_image:
+            if self._loading:
+                label = "Loading..."
+            elif self._load_error:
+                label = self._load_error
+            else:
+                label = "No image loaded"
             dc.SetTextForeground(wx.SystemSettings.GetColour(wx.SYS_COLOUR_GRAYTEXT))
-            dc.DrawLabel("No image loaded", self.GetClientRect(), wx.ALIGN_CENTER)
+            dc.DrawLabel(label, self.GetClientRect(), wx.ALIGN_CENTER)
             return
         
         window_width, window_height = self.GetSize()
@@ -112,9 +166,15 @@ class ImageViewer(wx.Panel):
         y = (window_height - scaled_height) // 2 + self.offset_y
         
         if scaled_width > 0 and scaled_height > 0:
-            scaled_image = self.current_image.Scale(scaled_width, scaled_height, wx.IMAGE_QUALITY_HIGH)
-            bitmap = wx.Bitmap(scaled_image)
-            dc.DrawBitmap(bitmap, x, y, True)
+            gc = wx.GraphicsContext.Create(dc) if self.current_bitmap else None
+            if gc:
+                gc.SetInterpolationQuality(wx.INTERPOLATION_BEST)
+                gc.DrawBitmap(self.current_bitmap, x, y, scaled_width, scaled_height)
+                del gc
+            else:
+                scaled_image = self.current_image.Scale(scaled_width, scaled_height, wx.IMAGE_QUALITY_HIGH)
+                bitmap = wx.Bitmap(scaled_image)
+                dc.DrawBitmap(bitmap, x, y, True)
         
         info_text = f"{os.path.basename(self.image_path)} | {img_width}x{img_height} | {int(self.zoom_level * 100)}%"
         dc.SetTextForeground(wx.SystemSettings.GetColour(wx.SYS_COLOUR_WINDOWTEXT))
@@ -169,13 +229,37 @@ class ImageViewer(wx.Panel):
         dx = event.GetX() - self.drag_start_x
         dy = event.GetY() - self.drag_start_y
         
+        if not self._pending_motion:
+            self._motion_old_rect = self._get_image_rect()
+            self._pending_motion = True
+            wx.CallAfter(self._flush_motion)
+        
         self.offset_x += dx
         self.offset_y += dy
         
         self.drag_start_x = event.GetX()
         self.drag_start_y = event.GetY()
-        
-        self.Refresh()
+    
+    def _flush_motion(self):
+        """Repaints only the area covered by the image before and after a pan."""
+        if not self:
+            return
+        self._pending_motion = False
+        old_rect = self._motion_old_rect
+        self._motion_old_rect = None
+        if not self.current_image or old_rect is None:
+            self.Refresh()
+            return
+        self.RefreshRect(old_rect.Union(self._get_image_rect()))
+    
+    def _get_image_rect(self):
+        """Returns the bounding rectangle of the image at the current zoom and offset."""
+        window_width, window_height = self.GetSize()
+        scaled_width = int(self.current_image.GetWidth() * self.zoom_level)
+        scaled_height = int(self.current_image.GetHeight() * self.zoom_level)
+        x = (window_width - scaled_width) // 2 + self.offset_x
+        y = (window_height - scaled_height) // 2 + self.offset_y
+        return wx.Rect(x, y, scaled_width, scaled_height)
     
     def reset_view(self):
         """Reset zoom and pan to default."""
@@ -3,6 +3,7 @@ lexer_themes.py – Language detection, theming, and mixins for the CodeEditor.
 """
 
 import re
+import functools
 import wx
 import wx.stc as stc
 import os
@@ -55,58 +56,141 @@ LIGHT_COLORS = {
     "fence_bg": "#F5F5F5",
 }
 
+# Signatures that can occur anywhere in the text, as (required substring, pattern) pairs.
+# The substring test rules most signatures out before any regex runs; a pattern of
+# None means the substring alone is the signature, a substring of None always runs the pattern.
 _PY_SIGNS = [
-    re.compile(r'^\s*def\s+\w+\s*\(', ML),
-    re.compile(r'^\s*class\s+\w+\s*:', ML),
-    re.compile(r':\s*(#.*)?$',         ML),
-    re.compile(r'\blambda\b'),
-    re.compile(r'\byield\b'),
-    re.compile(r'^\s*import\s+\w',    ML),
+    ('lambda', re.compile(r'\blambda\b')),
+    ('yield',  re.compile(r'\byield\b')),
 ]
 
 _C_SIGNS = [
-    re.compile(r'//'),
-    re.compile(r'/\*'),
-    re.compile(r'\{'),
-    re.compile(r';\s*(//.*)?$',           ML),
-    re.compile(r'#include\s*<',           ML),
-    re.compile(r'\bprintf\s*\('),
+    ('//',       None),
+    ('/*',       None),
+    # Braces count only in C idioms: a block after ')', '} else', '};', or the body of a
+    # struct/enum/union/namespace or extern "C" declaration, which is all many headers have.
+    (None,       re.compile(r'\)\s*\{|\}\s*else\b|\}\s*;'
+                            r'|\b(?:struct|enum|union|namespace)\b[^;{}()]*\{|\bextern\s+"C"\s*\{')),
+    ('#include', re.compile(r'#include\s*<')),
+    ('printf',   re.compile(r'\bprintf\s*\(')),
 ]
 
 _MD_SIGNS = [
-    re.compile(r'^\s*#{1,6}\s+\w', ML),
-    re.compile(r'^\s*[-*+]\s+\w',  ML),
-    re.compile(r'^\s*\d+\.\s+\w',  ML),
-    re.compile(r'\[.+?\]\(.+?\)'),
-    re.compile(r'\*\*.+?\*\*'),
+    ('](', re.compile(r'\[.+?\]\(.+?\)')),
+    ('**', re.compile(r'\*\*.+?\*\*')),
 ]
 
+# Line-anchored signatures are checked per line, dispatching on the first character
+# so the verifying match only runs on candidate lines.
+_MAX_SNIFF_LINES = 200
+_PY_DEF_RE = re.compile(r'def\s+\w+\s*\(')
+_PY_CLASS_RE = re.compile(r'class\s+\w+\s*:')
+_PY_IMPORT_RE = re.compile(r'import\s+\w')
+_PY_COLON_COMMENT_RE = re.compile(r':\s*#')
+_C_SEMI_COMMENT_RE = re.compile(r';\s*//')
+_MD_HEADER_RE = re.compile(r'#{1,6}\s+\w')
+_MD_LIST_RE = re.compile(r'[-*+]\s+\w')
+_MD_NUMBERED_RE = re.compile(r'\d+\.\s+\w')
+
+# Character-count prefilter: enough C punctuation with no Python keywords is decisive.
+_PREFILTER_SPAN = 1024
+_PREFILTER_C_PUNCT = 8
+
 _CODE_FENCE_RE = re.compile(r'(^|\n)\s*(?:`{3}|~{3})', ML)
 
 
+def _scan_line_signs(text: str):
+    """Counts the line-anchored Python, C and Markdown signatures present in text."""
+    py, c, md = set(), set(), set()
+    for raw in text.splitlines()[:_MAX_SNIFF_LINES]:
+        line = raw.strip()
+        if not line:
+            continue
+        first = line[0]
+        if first == 'd':
+            if _PY_DEF_RE.match(line):
+                py.add('def')
+        elif first == 'c':
+            if _PY_CLASS_RE.match(line):
+                py.add('class')
+        elif first == 'i':
+            if _PY_IMPORT_RE.match(line):
+                py.add('import')
+        elif first == '#':
+            if _MD_HEADER_RE.match(line):
+                md.add('header')
+        elif first in '-*+':
+            if _MD_LIST_RE.match(line):
+                md.add('list')
+        elif first.isdigit():
+            if _MD_NUMBERED_RE.match(line):
+                md.add('numbered')
+
+        if line.endswith(':') or ('#' in line and _PY_COLON_COMMENT_RE.search(line)):
+            py.add('colon')
+        if first != '#' and (line.endswith(';') or ('//' in line and _C_SEMI_COMMENT_RE.search(line))):
+            c.add('semicolon')
+    return len(py), len(c), len(md)
+
+
+def _count_signs(signs, text: str, limit: int, found: int = 0) -> int:
+    """Adds the signatures present in text to `found`, stopping once `limit` is reached."""
+    if found >= limit:
+        return found
+    for needle, p in signs:
+        if (needle is None or needle in text) and (p is None or p.search(text)):
+            found += 1
+            if found >= limit:
+                break
+    return found
+
+
 def detect_language(text: str,
                       t_py: int = 2,
                       t_c:  int = 2,
                       t_md: int = 2) -> str:
     """Guesses the language of a text snippet ('python', 'c', 'markdown', or 'unknown')."""
-    if _CODE_FENCE_RE.search(text):
+    if ('```' in text or '~~~' in text) and _CODE_FENCE_RE.search(text):
         return 'markdown'
 
-    py = sum(bool(p.search(text)) for p in _PY_SIGNS)
-    c  = sum(bool(p.search(text)) for p in _C_SIGNS)
+    head = text[:_PREFILTER_SPAN]
+    semicolons = head.count(';')
+    if (semicolons and semicolons + head.count('{') >= _PREFILTER_C_PUNCT
+            and 'def ' not in head and 'import ' not in head):
+        return 'c'
+
+    py_lines, c_lines, md_lines = _scan_line_signs(text)
+    py = _count_signs(_PY_SIGNS, text, py_lines + len(_PY_SIGNS), py_lines)
 
+    # C wins once it reaches its threshold and out-counts Python; no need to look further.
+    c_limit = max(t_c, py + 1)
+    c = _count_signs(_C_SIGNS, text, c_limit, c_lines)
+    if c >= c_limit:
+        return 'c'
     if py >= t_py and py > c:
         return 'python'
-    if c >= t_c and c > py:
-        return 'c'
 
-    md = sum(bool(p.search(text)) for p in _MD_SIGNS)
-    return 'markdown' if md >= t_md else 'unknown'
+    if _count_signs(_MD_SIGNS, text, t_md, md_lines) >= t_md:
+        return 'markdown'
+    return 'unknown'
+
+
+# Content-detection probe sizes used by guess_and_set_lexer.
+_PROBE_SHORT = 512
+_PROBE_LONG = 4000
+
+
+@functools.lru_cache(maxsize=64)
+def _detect_language_cached(text: str, t_py: int, t_c: int, t_md: int) -> str:
+    """Memoized detect_language so re-opening or re-probing the same content is a dict hit."""
+    return detect_language(text, t_py=t_py, t_c=t_c, t_md=t_md)
+
+
+_DEDENT_KWS = frozenset(('return', 'pass', 'break', 'continue', 'raise'))
 
 
 class AutoIndentMixin:
     """A mixin for StyledTextCtrl that provides automatic indentation."""
-    _dedent_re = re.compile(r'^\s*(return|pass|break|continue|raise)\b')
 
     def _on_char_added_indent(self, evt):
         key = evt.GetKey()
@@ -120,29 +204,177 @@ class AutoIndentMixin:
             evt.Skip()
             return
 
-        ind = self.GetLineIndentation(prev)
+        # Measure the previous line's indentation from its raw bytes. SetLineIndentation
+        # replaces whatever whitespace the new line already starts with, which matters when
+        # Enter is pressed before indented text.
+        prev_raw = self.GetLineRaw(prev).rstrip(b'\r\n')
+        prev_body = prev_raw.lstrip(b' \t')
+        indent = prev_raw[:len(prev_raw) - len(prev_body)]
+        ind = len(indent.expandtabs(self.GetTabWidth())) if b'\t' in indent else len(indent)
         self.SetLineIndentation(cur, ind)
-        self.GotoPos(self.PositionFromLine(cur) + ind)
+        self.GotoPos(self.GetLineIndentPosition(cur))
 
-        prev_txt = self.GetLine(prev).rstrip()
-        if prev_txt.endswith(':'):
+        if prev_body.rstrip().endswith(b':'):
             self.CmdKeyExecute(stc.STC_CMD_TAB)
         
-        current_line_text = self.GetLine(cur).strip()
-        if self._dedent_re.match(current_line_text):
+        first = self.GetLine(cur).split(None, 1)
+        if first and first[0] in _DEDENT_KWS:
             self.CmdKeyExecute(stc.STC_CMD_BACKTAB)
 
         evt.Skip()
 
 
+def _style_table(templates):
+    """Formats (style, spec template) pairs against both palettes, keyed by is_dark_mode().
+
+    StyleClearAll copies the default style to every style before a table is applied, so
+    specs that only restate the default foreground, background or size are dropped.
+    """
+    table = {}
+    for dark, colors in ((True, DARK_COLORS), (False, LIGHT_COLORS)):
+        default_attrs = {f"fore:{colors['fg']}", f"back:{colors['bg']}", "size:11"}
+        specs = ((style, spec.format(**colors)) for style, spec in templates)
+        table[dark] = tuple(
+            (style, spec) for style, spec in specs
+            if not set(spec.split(',')) <= default_attrs
+        )
+    return table
+
+
+_PY_STYLES = _style_table((
+    (stc.STC_P_DEFAULT,       "fore:{fg}"),
+    (stc.STC_P_COMMENTLINE,   "fore:{comment},italic"),
+    (stc.STC_P_NUMBER,        "fore:{number}"),
+    (stc.STC_P_STRING,        "fore:{string}"),
+    (stc.STC_P_WORD,          "fore:{keyword},bold"),
+))
+
+_C_STYLES = _style_table((
+    (stc.STC_C_DEFAULT,       "fore:{fg}"),
+    (stc.STC_C_COMMENT,       "fore:{comment},italic"),
+    (stc.STC_C_COMMENTLINE,   "fore:{comment},italic"),
+    (stc.STC_C_NUMBER,        "fore:{number}"),
+    (stc.STC_C_STRING,        "fore:{string}"),
+    (stc.STC_C_WORD,          "fore:{keyword},bold"),
+))
+
+def _resolve_md_style(name):
+    """Returns the markdown style id for `name`; wx builds use either prefix, or may lack it."""
+    for prefix in ("STC_MARKDOWN_", "STC_MD_"):
+        style = getattr(stc, prefix + name, None)
+        if style is not None:
+            return style
+    return None
+
+
+_MD_STYLE_IDS = {
+    name: _resolve_md_style(name)
+    for name in (
+        "DEFAULT", "HEADER1", "HEADER2", "HEADER3", "HEADER4", "HEADER5", "HEADER6",
+        "STRONG1", "STRONG", "BOLD", "EM1", "EM", "ITALIC",
+        "CODE", "CODEINLINE", "CODE2", "CODEBK", "LIST_ITEM", "BLOCKQUOTE",
+    )
+}
+
+
+def _md_templates(entries):
+    """Expands (candidate names, spec) entries into (style, spec) pairs for every name this wx build defines."""
+    return tuple(
+        (_MD_STYLE_IDS[name], spec)
+        for names, spec in entries
+        for name in names
+        if _MD_STYLE_IDS[name] is not None
+    )
+
+
+_MD_STYLES = _style_table(_md_templates((
+    (("DEFAULT",),                       "fore:{fg},size:11"),
+    (("HEADER1",),                       "fore:{header},bold,size:16"),
+    (("HEADER2",),                       "fore:{header},bold,size:14"),
+    (("HEADER3",),                       "fore:{header},bold,size:12"),
+    (("HEADER4",),                       "fore:{header},bold,size:11"),
+    (("HEADER5",),                       "fore:{header},bold,size:11"),
+    (("HEADER6",),                       "fore:{header},bold,size:11"),
+    (("STRONG1", "STRONG", "BOLD"),      "bold,fore:{emphasis}"),
+    (("EM1", "EM", "ITALIC"),            "italic,fore:{emphasis}"),
+    (("CODE", "CODEINLINE", "CODE2"),    "back:{code_bg},fore:{code},face:Courier New,size:10"),
+    (("CODEBK",),                        "back:{code_bg}"),
+    (("LIST_ITEM",),                     "fore:{list_item}"),
+    (("BLOCKQUOTE",),                    "fore:{blockquote},italic"),
+)))
+
+_MD_CODE_CONTENT_SPEC = "back:{code_bg},fore:{code},face:Courier New,size:10".format(**DARK_COLORS)
+
+_JSON_STYLES = _style_table((
+    (stc.STC_JSON_DEFAULT,        "fore:{fg}"),
+    (stc.STC_JSON_NUMBER,         "fore:{number}"),
+    (stc.STC_JSON_STRING,         "fore:{string}"),
+    (stc.STC_JSON_PROPERTYNAME,   "fore:{property}"),
+    (stc.STC_JSON_OPERATOR,       "fore:{operator}"),
+    (stc.STC_JSON_KEYWORD,        "fore:{keyword},bold"),
+    (stc.STC_JSON_ERROR,          "fore:{error},back:{error_bg}"),
+))
+
+_YAML_STYLES = _style_table((
+    (stc.STC_YAML_DEFAULT,        "fore:{fg}"),
+    (stc.STC_YAML_COMMENT,        "fore:{comment},italic"),
+    (stc.STC_YAML_IDENTIFIER,     "fore:{property},bold"),
+    (stc.STC_YAML_KEYWORD,        "fore:{keyword},bold"),
+    (stc.STC_YAML_NUMBER,         "fore:{number}"),
+    (stc.STC_YAML_TEXT,           "fore:{string}"),
+    (stc.STC_YAML_ERROR,          "fore:{error},back:{error_bg}"),
+    (stc.STC_YAML_OPERATOR,       "fore:{operator},bold"),
+))
+
+_INI_STYLES = _style_table((
+    (stc.STC_PROPS_DEFAULT,       "fore:{fg}"),
+    (stc.STC_PROPS_COMMENT,       "fore:{comment},italic"),
+    (stc.STC_PROPS_SECTION,       "fore:{keyword},bold"),
+    (stc.STC_PROPS_ASSIGNMENT,    "fore:{operator},bold"),
+    (stc.STC_PROPS_DEFVAL,        "fore:{string}"),
+    (stc.STC_PROPS_KEY,           "fore:{property}"),
+))
+
+# Shared by the .gitignore and .hxml themes, which both use the bash lexer.
+_SH_STYLES = _style_table((
+    (stc.STC_SH_DEFAULT,       "fore:{fg}"),
+    (stc.STC_SH_COMMENTLINE,   "fore:{comment},italic"),
+    (stc.STC_SH_WORD,          "fore:{keyword},bold"),
+    (stc.STC_SH_STRING,        "fore:{string}"),
+    (stc.STC_SH_NUMBER,        "fore:{number}"),
+    (stc.STC_SH_OPERATOR,      "fore:{operator},bold"),
+    (stc.STC_SH_IDENTIFIER,    "fore:{property}"),
+))
+
+
+def _keyword_list(words: str) -> str:
+    """Normalizes a keyword string for SetKeyWords: deduplicated, sorted, single-spaced."""
+    return " ".join(sorted(set(words.split())))
+
+
 class SmartLexerMixin:
     """
     Applies the proper lexer & palette (Python, C-family, Markdown, YAML, JSON, INI/TOML, plain).
     """
+    def _init_smart_lexer(self):
+        """Initializes lexer state and invalidates the cached colour scheme on system changes."""
+        self._is_dark_mode_cached = None
+        self._current_lang = None
+        self._indent_bound = False
+        self.Bind(wx.EVT_SYS_COLOUR_CHANGED, self._on_sys_colour_changed)
+
+    def _on_sys_colour_changed(self, event):
+        self._is_dark_mode_cached = None
+        self._current_lang = None
+        event.Skip()
+
     def is_dark_mode(self):
-        """Checks if the system is in dark mode."""
-        bg = wx.SystemSettings.GetColour(wx.SYS_COLOUR_WINDOW)
-        return bg.GetLuminance() < 0.5
+        """Checks if the system is in dark mode. The result is cached until the system colours change."""
+        cached = getattr(self, '_is_dark_mode_cached', None)
+        if cached is None:
+            bg = wx.SystemSettings.GetColour(wx.SYS_COLOUR_WINDOW)
+            cached = self._is_dark_mode_cached = bg.GetLuminance() < 0.5
+        return cached
 
     def _set_line_number_style(self):
         """Sets the line number margin style, respecting dark mode."""
@@ -169,13 +401,35 @@ class SmartLexerMixin:
         '.spec': 'python',
     }
 
-    _PY_KW = (
+    _LEXER_MAP = {
+        "python": stc.STC_LEX_PYTHON,
+        "c": stc.STC_LEX_CPP,
+        "markdown": stc.STC_LEX_MARKDOWN,
+        "json": stc.STC_LEX_JSON,
+        "yaml": stc.STC_LEX_YAML,
+        "ini": stc.STC_LEX_PROPERTIES,
+        "gitignore": stc.STC_LEX_BASH,
+        "hxml": stc.STC_LEX_BASH,
+    }
+
+    _THEME_METHODS = {
+        "python": "_apply_python_theme",
+        "c": "_apply_c_theme",
+        "markdown": "_apply_md_theme",
+        "json": "_apply_json_theme",
+        "yaml": "_apply_yaml_theme",
+        "ini": "_apply_ini_theme",
+        "gitignore": "_apply_gitignore_theme",
+        "hxml": "_apply_hxml_theme",
+    }
+
+    _PY_KW = _keyword_list(
         "and as assert break class continue def del elif else except False "
         "finally for from global if import in is lambda None nonlocal not or "
         "pass raise return True try while with yield"
     )
 
-    _C_KW = (
+    _C_KW = _keyword_list(
         "auto break case catch char class const continue default do double else "
         "enum extern float for goto if int long namespace new private protected "
         "public return short signed sizeof static struct switch template this "
@@ -186,22 +440,12 @@ class SmartLexerMixin:
         "abstract cast dynamic inline macro override typedef untyped using trace "
     )
 
-    _HXML_KW = (
+    _HXML_KW = _keyword_list(
         "-cp -lib -main -dce -debug -js -neko -swf -cpp -java -cs -php "
         "-python -lua -hl -D -resource -xml -json -cmd --next --each --cwd -v "
         "--help --version --run --no-output --times --connect --wait"
     )
 
-    @staticmethod
-    def _md_const(*names: str) -> int | None:
-        prefixes = ("STC_MARKDOWN_", "STC_MD_")
-        for n in names:
-            for p in prefixes:
-                ident = p + n
-                if hasattr(stc, ident):
-                    return getattr(stc, ident)
-        return None
-
     def _apply_theme(self, face, colors, apply_styles_func):
         """Generic theme application helper."""
         self.StyleSetSpec(stc.STC_STYLE_DEFAULT, f"face:{face},size:11,fore:{colors['fg']},back:{colors['bg']}")
@@ -210,127 +454,86 @@ class SmartLexerMixin:
         self._apply_base_style(colors)
         apply_styles_func(colors)
 
+    def _set_auto_indent(self, enabled):
+        """Binds or unbinds the auto-indent handler, touching the event table only on a change."""
+        if enabled == getattr(self, '_indent_bound', False):
+            return
+        if enabled:
+            self.Bind(stc.EVT_STC_CHARADDED, self._on_char_added_indent)
+        else:
+            self.Unbind(stc.EVT_STC_CHARADDED, handler=self._on_char_added_indent)
+        self._indent_bound = enabled
+
+    def _apply_style_table(self, table):
+        """Applies a precomputed sequence of (style, spec) pairs."""
+        for style, spec in table:
+            self.StyleSetSpec(style, spec)
+
     def _apply_python_theme(self):
-        colors = DARK_COLORS if self.is_dark_mode() else LIGHT_COLORS
+        dark = self.is_dark_mode()
         def apply_styles(c):
             self.SetKeyWords(0, self._PY_KW)
-            self.StyleSetSpec(stc.STC_P_DEFAULT,       f"fore:{c['fg']}")
-            self.StyleSetSpec(stc.STC_P_COMMENTLINE,  f"fore:{c['comment']},italic")
-            self.StyleSetSpec(stc.STC_P_NUMBER,        f"fore:{c['number']}")
-            self.StyleSetSpec(stc.STC_P_STRING,        f"fore:{c['string']}")
-            self.StyleSetSpec(stc.STC_P_WORD,          f"fore:{c['keyword']},bold")
-        self._apply_theme("Courier New", colors, apply_styles)
-        self.Bind(stc.EVT_STC_CHARADDED, self._on_char_added_indent)
+            self._apply_style_table(_PY_STYLES[dark])
+        self._apply_theme("Courier New", DARK_COLORS if dark else LIGHT_COLORS, apply_styles)
+        self._set_auto_indent(True)
 
     def _apply_c_theme(self):
-        colors = DARK_COLORS if self.is_dark_mode() else LIGHT_COLORS
+        dark = self.is_dark_mode()
         def apply_styles(c):
             self.SetKeyWords(0, self._C_KW)
-            self.StyleSetSpec(stc.STC_C_DEFAULT,       f"fore:{c['fg']}")
-            self.StyleSetSpec(stc.STC_C_COMMENT,       f"fore:{c['comment']},italic")
-            self.StyleSetSpec(stc.STC_C_COMMENTLINE,  f"fore:{c['comment']},italic")
-            self.StyleSetSpec(stc.STC_C_NUMBER,        f"fore:{c['number']}")
-            self.StyleSetSpec(stc.STC_C_STRING,        f"fore:{c['string']}")
-            self.StyleSetSpec(stc.STC_C_WORD,          f"fore:{c['keyword']},bold")
-        self._apply_theme("Courier New", colors, apply_styles)
-        self.Unbind(stc.EVT_STC_CHARADDED, handler=self._on_char_added_indent)
+            self._apply_style_table(_C_STYLES[dark])
+        self._apply_theme("Courier New", DARK_COLORS if dark else LIGHT_COLORS, apply_styles)
+        self._set_auto_indent(False)
 
     def _apply_md_theme(self):
-        colors = DARK_COLORS if self.is_dark_mode() else LIGHT_COLORS
+        dark = self.is_dark_mode()
         def apply_styles(c):
-            if self.is_dark_mode():
-                self.StyleSetSpec(MD_CODE_CONTENT_STYLE, f"back:{c['code_bg']},fore:{c['code']},face:Courier New,size:10")
-
-            def sty(names, spec):
-                for name in names:
-                    s = self._md_const(name)
-                    if s is not None:
-                        self.StyleSetSpec(s, spec)
-
-            sty(("DEFAULT",), f"fore:{c['fg']},size:11")
-            sty(("HEADER1",), f"fore:{c['header']},bold,size:16")
-            sty(("HEADER2",), f"fore:{c['header']},bold,size:14")
-            sty(("HEADER3",), f"fore:{c['header']},bold,size:12")
-            sty(("HEADER4",), f"fore:{c['header']},bold,size:11")
-            sty(("HEADER5",), f"fore:{c['header']},bold,size:11")
-            sty(("HEADER6",), f"fore:{c['header']},bold,size:11")
-            sty(("STRONG1", "STRONG", "BOLD"), f"bold,fore:{c['emphasis']}")
-            sty(("EM1", "EM", "ITALIC"),       f"italic,fore:{c['emphasis']}")
-            sty(("CODE", "CODEINLINE", "CODE2"), f"back:{c['code_bg']},fore:{c['code']},face:Courier New,size:10")
-            sty(("CODEBK",), f"back:{c['code_bg']}")
-            sty(("LIST_ITEM",),  f"fore:{c['list_item']}")
-            sty(("BLOCKQUOTE",), f"fore:{c['blockquote']},italic")
-        self._apply_theme("Arial", colors, apply_styles)
-        self.Unbind(stc.EVT_STC_CHARADDED, handler=self._on_char_added_indent)
+            if dark:
+                self.StyleSetSpec(MD_CODE_CONTENT_STYLE, _MD_CODE_CONTENT_SPEC)
+            self._apply_style_table(_MD_STYLES[dark])
+        self._apply_theme("Arial", DARK_COLORS if dark else LIGHT_COLORS, apply_styles)
+        self._set_auto_indent(False)
 
     def _apply_json_theme(self):
-        colors = DARK_COLORS if self.is_dark_mode() else LIGHT_COLORS
-        def apply_styles(c):
-            self.StyleSetSpec(stc.STC_JSON_DEFAULT,        f"fore:{c['fg']}")
-            self.StyleSetSpec(stc.STC_JSON_NUMBER,         f"fore:{c['number']}")
-            self.StyleSetSpec(stc.STC_JSON_STRING,         f"fore:{c['string']}")
-            self.StyleSetSpec(stc.STC_JSON_PROPERTYNAME,   f"fore:{c['property']}")
-            self.StyleSetSpec(stc.STC_JSON_OPERATOR,       f"fore:{c['operator']}")
-            self.StyleSetSpec(stc.STC_JSON_KEYWORD,        f"fore:{c['keyword']},bold")
-            self.StyleSetSpec(stc.STC_JSON_ERROR,          f"fore:{c['error']},back:{c['error_bg']}")
-        self._apply_theme("Courier New", colors, apply_styles)
-        self.Unbind(stc.EVT_STC_CHARADDED, handler=self._on_char_added_indent)
+        dark = self.is_dark_mode()
+        self._apply_theme("Courier New", DARK_COLORS if dark else LIGHT_COLORS,
+                          lambda c: self._apply_style_table(_JSON_STYLES[dark]))
+        self._set_auto_indent(False)
 
     def _apply_yaml_theme(self):
-        colors = DARK_COLORS if self.is_dark_mode() else LIGHT_COLORS
-        def apply_styles(c):
-            self.StyleSetSpec(stc.STC_YAML_DEFAULT,        f"fore:{c['fg']}")
-            self.StyleSetSpec(stc.STC_YAML_COMMENT,        f"fore:{c['comment']},italic")
-            self.StyleSetSpec(stc.STC_YAML_IDENTIFIER,     f"fore:{c['property']},bold")
-            self.StyleSetSpec(stc.STC_YAML_KEYWORD,        f"fore:{c['keyword']},bold")
-            self.StyleSetSpec(stc.STC_YAML_NUMBER,         f"fore:{c['number']}")
-            self.StyleSetSpec(stc.STC_YAML_TEXT,           f"fore:{c['string']}")
-            self.StyleSetSpec(stc.STC_YAML_ERROR,          f"fore:{c['error']},back:{c['error_bg']}")
-            self.StyleSetSpec(stc.STC_YAML_OPERATOR,       f"fore:{c['operator']},bold")
-        self._apply_theme("Courier New", colors, apply_styles)
-        self.Unbind(stc.EVT_STC_CHARADDED, handler=self._on_char_added_indent)
+        dark = self.is_dark_mode()
+        self._apply_theme("Courier New", DARK_COLORS if dark else LIGHT_COLORS,
+                          lambda c: self._apply_style_table(_YAML_STYLES[dark]))
+        self._set_auto_indent(False)
 
     def _apply_ini_theme(self):
-        colors = DARK_COLORS if self.is_dark_mode() else LIGHT_COLORS
-        def apply_styles(c):
-            self.StyleSetSpec(stc.STC_PROPS_DEFAULT,          f"fore:{c['fg']}")
-            self.StyleSetSpec(stc.STC_PROPS_COMMENT,          f"fore:{c['comment']},italic")
-            self.StyleSetSpec(stc.STC_PROPS_SECTION,          f"fore:{c['keyword']},bold")
-            self.StyleSetSpec(stc.STC_PROPS_ASSIGNMENT,       f"fore:{c['operator']},bold")
-            self.StyleSetSpec(stc.STC_PROPS_DEFVAL,           f"fore:{c['string']}")
-            self.StyleSetSpec(stc.STC_PROPS_KEY,              f"fore:{c['property']}")
-        self._apply_theme("Courier New", colors, apply_styles)
-        self.Unbind(stc.EVT_STC_CHARADDED, handler=self._on_char_added_indent)
+        dark = self.is_dark_mode()
+        self._apply_theme("Courier New", DARK_COLORS if dark else LIGHT_COLORS,
+                          lambda c: self._apply_style_table(_INI_STYLES[dark]))
+        self._set_auto_indent(False)
 
     def _apply_gitignore_theme(self):
-        colors = DARK_COLORS if self.is_dark_mode() else LIGHT_COLORS
-        def apply_styles(c):
-            self.StyleSetSpec(stc.STC_SH_DEFAULT,       f"fore:{c['fg']}")
-            self.StyleSetSpec(stc.STC_SH_COMMENTLINE,   f"fore:{c['comment']},italic")
-            self.StyleSetSpec(stc.STC_SH_WORD,          f"fore:{c['keyword']},bold")
-            self.StyleSetSpec(stc.STC_SH_STRING,        f"fore:{c['string']}")
-            self.StyleSetSpec(stc.STC_SH_NUMBER,        f"fore:{c['number']}")
-            self.StyleSetSpec(stc.STC_SH_OPERATOR,      f"fore:{c['operator']},bold")
-            self.StyleSetSpec(stc.STC_SH_IDENTIFIER,    f"fore:{c['property']}")
-        self._apply_theme("Courier New", colors, apply_styles)
-        self.Unbind(stc.EVT_STC_CHARADDED, handler=self._on_char_added_indent)
+        dark = self.is_dark_mode()
+        self._apply_theme("Courier New", DARK_COLORS if dark else LIGHT_COLORS,
+                          lambda c: self._apply_style_table(_SH_STYLES[dark]))
+        self._set_auto_indent(False)
 
     def _apply_hxml_theme(self):
-        colors = DARK_COLORS if self.is_dark_mode() else LIGHT_COLORS
+        dark = self.is_dark_mode()
         def apply_styles(c):
             self.SetKeyWords(0, self._HXML_KW)
-            self.StyleSetSpec(stc.STC_SH_DEFAULT,       f"fore:{c['fg']}")
-            self.StyleSetSpec(stc.STC_SH_COMMENTLINE,   f"fore:{c['comment']},italic")
-            self.StyleSetSpec(stc.STC_SH_WORD,          f"fore:{c['keyword']},bold")
-            self.StyleSetSpec(stc.STC_SH_STRING,        f"fore:{c['string']}")
-            self.StyleSetSpec(stc.STC_SH_NUMBER,        f"fore:{c['number']}")
-            self.StyleSetSpec(stc.STC_SH_OPERATOR,      f"fore:{c['operator']},bold")
-            self.StyleSetSpec(stc.STC_SH_IDENTIFIER,    f"fore:{c['property']}")
-        self._apply_theme("Courier New", colors, apply_styles)
-        self.Unbind(stc.EVT_STC_CHARADDED, handler=self._on_char_added_indent)
+            self._apply_style_table(_SH_STYLES[dark])
+        self._apply_theme("Courier New", DARK_COLORS if dark else LIGHT_COLORS, apply_styles)
+        self._set_auto_indent(False)
 
     def _set_lexer_for_lang(self, lang: str):
         """Helper to apply lexer and theme for a language string."""
+        lexer = self._LEXER_MAP.get(lang, stc.STC_LEX_NULL)
+
+        # Theme and full-document colourise already match; nothing to redo.
+        if lang == getattr(self, '_current_lang', None) and self.GetLexer() == lexer:
+            return
+
         if not hasattr(self, '_default_word_chars'):
             self._default_word_chars = self.GetWordChars()
         
@@ -340,38 +543,18 @@ class SmartLexerMixin:
             if self.GetWordChars() != self._default_word_chars:
                 self.SetWordChars(self._default_word_chars)
 
-        theme_map = {
-            "python": self._apply_python_theme,
-            "c": self._apply_c_theme,
-            "markdown": self._apply_md_theme,
-            "json": self._apply_json_theme,
-            "yaml": self._apply_yaml_theme,
-            "ini": self._apply_ini_theme,
-            "gitignore": self._apply_gitignore_theme,
-            "hxml": self._apply_hxml_theme
-        }
-        lexer_map = {
-            "python": stc.STC_LEX_PYTHON,
-            "c": stc.STC_LEX_CPP,
-            "markdown": stc.STC_LEX_MARKDOWN,
-            "json": stc.STC_LEX_JSON,
-            "yaml": stc.STC_LEX_YAML,
-            "ini": stc.STC_LEX_PROPERTIES,
-            "gitignore": stc.STC_LEX_BASH,
-            "hxml": stc.STC_LEX_BASH
-        }
-
-        lexer = lexer_map.get(lang, stc.STC_LEX_NULL)
         self.SetLexer(lexer)
-        if lang in theme_map:
-            theme_map[lang]()
+        theme_method = self._THEME_METHODS.get(lang)
+        if theme_method:
+            getattr(self, theme_method)()
             if lang == "markdown":
                 self.SetWrapMode(stc.STC_WRAP_WORD)
         else:
             colors = DARK_COLORS if self.is_dark_mode() else LIGHT_COLORS
             self._apply_theme("Courier New", colors, lambda c: None)
-            self.Unbind(stc.EVT_STC_CHARADDED, handler=self._on_char_added_indent)
+            self._set_auto_indent(False)
 
+        self._current_lang = lang
         self.Colourise(0, self.GetTextLength())
 
     def guess_and_set_lexer(self, filepath=None):
@@ -383,26 +566,30 @@ class SmartLexerMixin:
         lang = 'unknown'
         self._lang_from_ext = False
         if filepath:
-            filename = os.path.basename(filepath)
-            if filename.lower() == '.gitignore':
+            filename = os.path.basename(filepath).lower()
+            if filename == '.gitignore':
                 lang = 'gitignore'
                 self._lang_from_ext = True
             else:
-                _, ext = os.path.splitext(filepath)
-                if ext.lower() in self._EXT_MAP:
-                    lang = self._EXT_MAP[ext.lower()]
+                # A leading dot alone is a hidden file, not an extension (same as os.path.splitext).
+                dot = filename.rfind('.')
+                ext_lang = self._EXT_MAP.get(filename[dot:]) if dot > 0 else None
+                if ext_lang is not None:
+                    lang = ext_lang
                     self._lang_from_ext = True
 
         if not self._lang_from_ext:
-            snippet = self.GetTextRange(0, min(self.GetTextLength(), 4000))
-            lang = detect_language(snippet, t_py=2, t_c=2, t_md=1)
+            length = self.GetTextLength()
+            if length:
+                # Code is usually recognisable from a short prefix. Markdown and unknown
+                # results are not, since a licence header or docstring looks like prose.
+                snippet = self.GetTextRange(0, min(length, _PROBE_SHORT))
+                lang = _detect_language_cached(snippet, 2, 2, 1)
+                if lang not in ('python', 'c') and length > _PROBE_SHORT:
+                    snippet = self.GetTextRange(0, min(length, _PROBE_LONG))
+                    lang = _detect_language_cached(snippet, 2, 2, 1)
         
-        new_lexer = {
-            "python": stc.STC_LEX_PYTHON, "c": stc.STC_LEX_CPP,
-            "markdown": stc.STC_LEX_MARKDOWN, "json": stc.STC_LEX_JSON,
-            "yaml": stc.STC_LEX_YAML, "ini": stc.STC_LEX_PROPERTIES,
-            "gitignore": stc.STC_LEX_BASH, "hxml": stc.STC_LEX_BASH,
-        }.get(lang, stc.STC_LEX_NULL)
-
-        if self.GetLexer() != new_lexer:
+        new_lexer = self._LEXER_MAP.get(lang, stc.STC_LEX_NULL)
+
+        if self.GetLexer() != new_lexer or lang != getattr(self, '_current_lang', None):
             self._set_lexer_for_lang(lang)
\ No newline at end of file
@@ -1,14 +1,51 @@
 import wx
 import wx.media
 import os
+import logging
+import threading
+import weakref
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+
+def _dispatch_shared_timer(event):
+    """Forwards a tick of the shared timer to every player that is currently playing."""
+    for player in list(SoundPlayer._active_players):
+        if player:
+            player._tick()
+        else:
+            SoundPlayer._active_players.discard(player)
+    if not SoundPlayer._active_players:
+        SoundPlayer._shared_timer.Stop()
+
 
 class SoundPlayer(wx.Panel):
     """A panel that plays audio files with playback controls."""
     
-    SUPPORTED_FORMATS = {
+    # One timer drives the progress display of every playing instance.
+    _shared_timer = None
+    _active_players = weakref.WeakSet()
+    # The time label only shows whole seconds, so a quarter-second cadence is plenty.
+    _TICK_MS = 250
+    _BOLD_FONT = None
+    
+    # Ports whose only media backend (GStreamer, AVFoundation/QuickTime) keeps its output
+    # stream open, so the first Play() does not click and the silent warm-up can be skipped.
+    _PERSISTENT_OUTPUT_PLATFORMS = frozenset({'__WXGTK__', '__WXMAC__'})
+    # Fade-in used instead on the other backends when playback starts from the beginning.
+    _RAMP_STEPS = 4
+    _RAMP_MS = 20
+    # Some backends never deliver EVT_MEDIA_LOADED; finish the preload anyway after this long.
+    _PRELOAD_TIMEOUT_MS = 3000
+    
+    SUPPORTED_FORMATS = frozenset({
         '.mp3', '.wav', '.ogg', '.flac', '.m4a', '.aac', 
         '.wma', '.opus', '.aiff', '.ape', '.mpc'
-    }
+    })
+    _EXT_TUPLE = tuple(SUPPORTED_FORMATS)
     
     def __init__(self, parent):
         """Initializes the SoundPlayer panel."""
@@ -22,6 +59,12 @@ class SoundPlayer(wx.Panel):
         self.is_restarting = False
         self.user_volume = 0.75
         self.is_ready = False
+        self._last_pos_sec = 0
+        self._cached_file_size = None
+        self._preload_pending = False
+        self._load_generation = 0
+        self._seek_seamless_failed = False
+        self._ctrl_volume = None
         
         self.media_ctrl_id = wx.NewIdRef()
         self.media_ctrl = wx.media.MediaCtrl(
@@ -36,7 +79,7 @@ class SoundPlayer(wx.Panel):
         info_sizer = wx.BoxSizer(wx.VERTICAL)
         
         self.file_label = wx.StaticText(info_panel, label="No audio file loaded")
-        self.file_label.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
+        self.file_label.SetFont(self._get_bold_font())
         info_sizer.Add(self.file_label, 0, wx.ALL | wx.EXPAND, 5)
         
         self.info_label = wx.StaticText(info_panel, label="")
@@ -126,28 +169,64 @@ class SoundPlayer(wx.Panel):
         self.Bind(wx.media.EVT_MEDIA_FINISHED, self.on_media_finished, id=self.media_ctrl_id)
         self.Bind(wx.media.EVT_MEDIA_STOP, self.on_media_stop, id=self.media_ctrl_id)
         
-        self.timer = wx.Timer(self)
-        self.Bind(wx.EVT_TIMER, self.on_timer)
-        
-        self.media_ctrl.SetVolume(self.user_volume)
+        self._set_volume(self.user_volume)
+    
+    @classmethod
+    def _get_bold_font(cls):
+        """Returns the file label font, created once the wx.App exists and shared by all players."""
+        if cls._BOLD_FONT is None:
+            cls._BOLD_FONT = wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD)
+        return cls._BOLD_FONT
+    
+    @classmethod
+    def _ensure_timer(cls):
+        """Creates the shared progress timer on first use."""
+        if cls._shared_timer is None:
+            cls._shared_timer = wx.Timer()
+            cls._shared_timer.Bind(wx.EVT_TIMER, _dispatch_shared_timer)
+        return cls._shared_timer
+    
+    def _register_active(self):
+        """Subscribes this player to the shared timer, starting it if it is idle."""
+        SoundPlayer._active_players.add(self)
+        timer = self._ensure_timer()
+        if not timer.IsRunning():
+            timer.Start(self._TICK_MS)
+    
+    def _unregister_active(self):
+        """Unsubscribes this player, stopping the shared timer once nothing is playing."""
+        SoundPlayer._active_players.discard(self)
+        timer = SoundPlayer._shared_timer
+        if timer is not None and not SoundPlayer._active_players and timer.IsRunning():
+            timer.Stop()
     
     @classmethod
     def is_supported_audio(cls, filepath):
         """Check if the file is a supported audio format."""
-        if not filepath:
-            return False
-        ext = os.path.splitext(filepath)[1].lower()
-        return ext in cls.SUPPORTED_FORMATS
+        return bool(filepath) and filepath.lower().endswith(cls._EXT_TUPLE)
     
     def load_audio(self, filepath):
         """
         Prepare an audio file for playback.
         Loads immediately with volume at 0 to "warm up" audio hardware.
+        Re-selecting the file that is already loaded and idle just rewinds it.
         """
+        if filepath == self.current_file and self.is_ready and not self.is_playing:
+            if self.is_paused:
+                self.stop()
+            else:
+                self.media_ctrl.Seek(0)
+            self.info_label.SetLabel("Ready to play")
+            self.play_button.Enable(True)
+            self.play_loop_button.Enable(True)
+            return True
+        
         self.pending_file = filepath
         self.current_file = None
         self.is_loaded = False
         self.is_ready = False
+        self._preload_pending = False
+        self._seek_seamless_failed = False
         
         if self.is_playing or self.is_paused:
             self.media_ctrl.Stop()
@@ -156,70 +235,117 @@ class SoundPlayer(wx.Panel):
         self.is_paused = False
         self.loop_mode = False
         self.is_restarting = False
-        self.timer.Stop()
-        
-        filename = os.path.basename(filepath)
-        self.file_label.SetLabel(filename)
+        self._unregister_active()
         
+        # Batch the control resets into a single repaint.
+        self.Freeze()
         try:
-            file_size = os.path.getsize(filepath)
-            size_str = self._format_file_size(file_size)
-            self.info_label.SetLabel(f"Loading... | Size: {size_str}")
-        except:
+            filename = os.path.basename(filepath)
+            self.file_label.SetLabel(filename)
+        
+            self._cached_file_size = None
             self.info_label.SetLabel("Loading...")
         
-        self.play_button.Enable(False)
-        self.play_loop_button.Enable(False)
-        self.pause_button.Enable(False)
-        self.stop_button.Enable(False)
+            self.play_button.Enable(False)
+            self.play_loop_button.Enable(False)
+            self.pause_button.Enable(False)
+            self.stop_button.Enable(False)
         
-        self.progress_slider.Enable(False)
-        self.progress_slider.SetValue(0)
-        self.progress_slider.SetMax(100)
-        self.current_time_label.SetLabel("0:00")
-        self.total_time_label.SetLabel("0:00")
+            self.progress_slider.Enable(False)
+            self.progress_slider.SetValue(0)
+            self._last_pos_sec = 0
+            self.progress_slider.SetMax(100)
+            self.current_time_label.SetLabel("0:00")
+            self.total_time_label.SetLabel("0:00")
+        finally:
+            self.Thaw()
         
-        wx.CallAfter(self._preload_silent, filepath)
+        self._load_generation += 1
+        thread = threading.Thread(target=self._bg_prepare, args=(filepath, self._load_generation), daemon=True)
+        thread.start()
         
         return True
     
+    def _bg_prepare(self, filepath, generation):
+        """Stats the file off the UI thread, which can be slow on network storage."""
+        try:
+            size = os.stat(filepath).st_size
+        except OSError:
+            size = None
+        wx.CallAfter(self._apply_prepare_result, filepath, size, generation)
+    
+    def _apply_prepare_result(self, filepath, size, generation):
+        """Shows the file size and starts the preload on the UI thread, ignoring stale loads."""
+        if not self or generation != self._load_generation:
+            return
+        self._cached_file_size = size
+        if size is not None:
+            self.info_label.SetLabel(f"Loading... | Size: {self._format_file_size(size)}")
+        self._preload_silent(filepath)
+    
     def _preload_silent(self, filepath):
         """
         Pre-load the file with volume muted to initialize audio hardware.
         This prevents the click sound when the user presses play.
+        The warm-up itself runs from on_media_loaded once the backend reports the media ready.
         """
         try:
-            self.media_ctrl.SetVolume(0.0)
+            self._set_volume(0.0)
             
+            # Set before Load(): some backends deliver EVT_MEDIA_LOADED from inside the call.
+            self._preload_pending = True
             if self.media_ctrl.Load(filepath):
                 self.current_file = filepath
                 self.is_loaded = True
-                
-                wx.CallLater(100, self._initialize_audio_hardware)
+                if self._preload_pending:
+                    wx.CallLater(self._PRELOAD_TIMEOUT_MS, self._on_preload_timeout,
+                                 self._load_generation)
             else:
-                self.media_ctrl.SetVolume(self.user_volume)
+                self._preload_pending = False
+                self._set_volume(self.user_volume)
                 self.info_label.SetLabel("Failed to load")
                 
         except Exception as e:
-            print(f"Preload error: {e}")
-            self.media_ctrl.SetVolume(self.user_volume)
+            _log.warning("Preload error: %s", e)
+            self._preload_pending = False
+            self._set_volume(self.user_volume)
             self.info_label.SetLabel("Error loading file")
     
+    def _set_volume(self, volume):
+        """Sets the media volume, skipping the backend call when it is already at that level."""
+        if volume == self._ctrl_volume:
+            return
+        self.media_ctrl.SetVolume(volume)
+        self._ctrl_volume = volume
+    
+    def _needs_warmup(self):
+        """Whether the media backend needs the silent warm-up to avoid a click on first play."""
+        return wx.Platform not in self._PERSISTENT_OUTPUT_PLATFORMS
+    
+    def _ramp_volume(self, step):
+        """Raises the volume to user_volume over _RAMP_STEPS ticks after a start from silence."""
+        if not self:
+            return
+        if step >= self._RAMP_STEPS or not self.is_playing:
+            self._set_volume(self.user_volume)
+            return
+        self._set_volume(self.user_volume * step / self._RAMP_STEPS)
+        wx.CallLater(self._RAMP_MS, self._ramp_volume, step + 1)
+    
     def _initialize_audio_hardware(self):
         """
         Initialize the audio hardware by briefly playing and stopping.
         This must happen after the media is fully loaded.
         """
+        self._preload_pending = False
         try:
             self.media_ctrl.Seek(0)
             
             self.media_ctrl.Play()
             
-            wx.CallLater(100, self._finalize_preload)
-            
         except Exception as e:
-            print(f"Initialize hardware error: {e}")
-            self._finalize_preload()
+            _log.warning("Initialize hardware error: %s", e)
+        self._finalize_preload()
     
     def _finalize_preload(self):
         """Stop the preload playback and make the file ready for actual playback."""
@@ -227,19 +353,23 @@ class SoundPlayer(wx.Panel):
             self.media_ctrl.Stop()
             self.media_ctrl.Seek(0)
             
-            self.media_ctrl.SetVolume(self.user_volume)
+            self._set_volume(self.user_volume)
             
             self.is_ready = True
             
-            self.info_label.SetLabel("Ready to play")
-            self.play_button.Enable(True)
-            self.play_loop_button.Enable(True)
+            self.Freeze()
+            try:
+                self.info_label.SetLabel("Ready to play")
+                self.play_button.Enable(True)
+                self.play_loop_button.Enable(True)
+            finally:
+                self.Thaw()
             
-            print(f"Preload complete. Volume restored to: {self.user_volume}, Ready: {self.is_ready}")
+            _log.debug("Preload complete. Volume restored to: %s, Ready: %s", self.user_volume, self.is_ready)
             
         except Exception as e:
-            print(f"Finalize preload error: {e}")
-            self.media_ctrl.SetVolume(self.user_volume)
+            _log.warning("Finalize preload error: %s", e)
+            self._set_volume(self.user_volume)
             self.is_ready = True
             self.play_button.Enable(True)
             self.play_loop_button.Enable(True)
@@ -253,15 +383,32 @@ class SoundPlayer(wx.Panel):
             self.total_time_label.SetLabel(self._format_time(length))
             
             if self.is_ready and self.current_file:
-                try:
-                    file_size = os.path.getsize(self.current_file)
-                    size_str = self._format_file_size(file_size)
-                    duration_str = self._format_time(length)
+                duration_str = self._format_time(length)
+                if self._cached_file_size is not None:
+                    size_str = self._format_file_size(self._cached_file_size)
                     self.info_label.SetLabel(f"Duration: {duration_str} | Size: {size_str}")
-                except:
-                    self.info_label.SetLabel(f"Duration: {self._format_time(length)}")
+                else:
+                    self.info_label.SetLabel(f"Duration: {duration_str}")
         
         self.Layout()
+        
+        if self._preload_pending:
+            self._complete_preload()
+    
+    def _on_preload_timeout(self, generation):
+        """Makes the file playable if its EVT_MEDIA_LOADED has not arrived in time."""
+        if not self or generation != self._load_generation or not self._preload_pending:
+            return
+        _log.debug("No media loaded event after %d ms, finishing preload", self._PRELOAD_TIMEOUT_MS)
+        self._complete_preload()
+    
+    def _complete_preload(self):
+        """Runs the warm-up where the backend needs it and marks the file ready."""
+        if self._needs_warmup():
+            self._initialize_audio_hardware()
+        else:
+            self._preload_pending = False
+            self._finalize_preload()
     
     def on_play(self, event):
         """Handle play button click."""
@@ -279,20 +426,26 @@ class SoundPlayer(wx.Panel):
             wx.MessageBox("Audio file not ready. Please wait a moment.", "Not Ready", wx.ICON_INFORMATION)
             return
         
-        self.media_ctrl.SetVolume(self.user_volume)
-        print(f"Starting playback with volume: {self.user_volume}")
+        self._set_volume(self.user_volume)
+        _log.debug("Starting playback with volume: %s", self.user_volume)
         
+        ramp = False
         if self.is_paused:
             self.media_ctrl.Play()
             self.is_paused = False
         else:
             self.media_ctrl.Seek(0)
+            ramp = self._needs_warmup()
+            if ramp:
+                self._set_volume(0.0)
             self.media_ctrl.Play()
         
         self.is_playing = True
         self.pause_button.Enable(True)
         self.stop_button.Enable(True)
-        self.timer.Start(100)
+        self._register_active()
+        if ramp:
+            self._ramp_volume(1)
     
     def on_pause(self, event):
         """Handle pause button click."""
@@ -300,7 +453,7 @@ class SoundPlayer(wx.Panel):
             self.media_ctrl.Pause()
             self.is_paused = True
             self.is_playing = False
-            self.timer.Stop()
+            self._unregister_active()
     
     def on_stop(self, event):
         """Handle stop button click."""
@@ -316,30 +469,36 @@ class SoundPlayer(wx.Panel):
         self.is_playing = False
         self.is_paused = False
         self.loop_mode = False
-        self.timer.Stop()
+        self._unregister_active()
         self.pause_button.Enable(False)
         self.progress_slider.SetValue(0)
+        self._last_pos_sec = 0
         self.current_time_label.SetLabel("0:00")
     
     def on_volume_change(self, event):
         """Handle volume slider change."""
         volume = self.volume_slider.GetValue()
         self.user_volume = volume / 100.0
-        self.media_ctrl.SetVolume(self.user_volume)
+        self._set_volume(self.user_volume)
         self.volume_value_label.SetLabel(f"{volume}%")
-        print(f"Volume changed to: {self.user_volume}")
+        _log.debug("Volume changed to: %s", self.user_volume)
     
     def on_seek(self, event):
         """Handle seek slider change."""
         if self.is_loaded and self.media_ctrl.Length() > 0:
             position = self.progress_slider.GetValue()
             self.media_ctrl.Seek(position)
+            self._last_pos_sec = position // 1000
             self.current_time_label.SetLabel(self._format_time(position))
     
-    def on_timer(self, event):
-        """Update progress slider and time label."""
+    def _tick(self):
+        """Update progress slider and time label on a shared timer tick."""
         if self.is_playing and not self.is_restarting and self.is_loaded:
             position = self.media_ctrl.Tell()
+            # Skip the widget updates until the displayed second actually changes.
+            if position // 1000 == self._last_pos_sec:
+                return
+            self._last_pos_sec = position // 1000
             self.progress_slider.SetValue(position)
             self.current_time_label.SetLabel(self._format_time(position))
     
@@ -353,7 +512,7 @@ class SoundPlayer(wx.Panel):
         else:
             self.is_playing = False
             self.is_paused = False
-            self.timer.Stop()
+            self._unregister_active()
             self.pause_button.Enable(False)
     
     def on_media_finished(self, event):
@@ -370,9 +529,10 @@ class SoundPlayer(wx.Panel):
         """Final cleanup when playback ends normally."""
         self.is_playing = False
         self.is_paused = False
-        self.timer.Stop()
+        self._unregister_active()
         self.pause_button.Enable(False)
         self.progress_slider.SetValue(0)
+        self._last_pos_sec = 0
         self.current_time_label.SetLabel("0:00")
     
     def _restart_for_loop(self):
@@ -386,32 +546,24 @@ class SoundPlayer(wx.Panel):
         self.is_restarting = True
         
         try:
-            self.media_ctrl.SetVolume(self.user_volume)
+            self._set_volume(self.user_volume)
             
-            seek_result = self.media_ctrl.Seek(0)
-            wx.CallLater(50, self._complete_loop_restart)
-                
-        except Exception as e:
-            self.is_restarting = False
-            self._cleanup_after_failed_loop()
-    
-    def _complete_loop_restart(self):
-        """Complete the loop restart after seek."""
-        try:
-            play_result = self.media_ctrl.Play()
+            # Rewind and replay in place; once a backend has refused that, go
+            # straight to the reload path for the rest of this file.
+            if not self._seek_seamless_failed:
+                for _ in range(2):
+                    self.media_ctrl.Seek(0)
+                    if self.media_ctrl.Play():
+                        self.is_playing = True
+                        self.is_paused = False
+                        self.pause_button.Enable(True)
+                        self._register_active()
+                        self.is_restarting = False
+                        return
+                self._seek_seamless_failed = True
             
-            if play_result:
-                self.is_playing = True
-                self.is_paused = False
-                self.pause_button.Enable(True)
-                if not self.timer.IsRunning():
-                    self.timer.Start(100)
-            else:
-                self.media_ctrl.Stop()
-                wx.CallLater(100, self._reload_and_play)
-                return
-                
-            self.is_restarting = False
+            self.media_ctrl.Stop()
+            wx.CallLater(100, self._reload_and_play)
                 
         except Exception as e:
             self.is_restarting = False
@@ -420,18 +572,18 @@ class SoundPlayer(wx.Panel):
     def _reload_and_play(self):
         """Alternative restart method: reload the file."""
         try:
-            self.media_ctrl.SetVolume(0.0)
+            self._set_volume(0.0)
             
             if self.media_ctrl.Load(self.current_file):
-                self.media_ctrl.SetVolume(self.user_volume)
+                self._set_volume(self.user_volume)
                 wx.CallLater(100, self._play_after_reload)
             else:
-                self.media_ctrl.SetVolume(self.user_volume)
+                self._set_volume(self.user_volume)
                 self.is_restarting = False
                 self._cleanup_after_failed_loop()
                 
         except Exception as e:
-            self.media_ctrl.SetVolume(self.user_volume)
+            self._set_volume(self.user_volume)
             self.is_restarting = False
             self._cleanup_after_failed_loop()
     
@@ -446,8 +598,7 @@ class SoundPlayer(wx.Panel):
                 self.is_playing = True
                 self.is_paused = False
                 self.pause_button.Enable(True)
-                if not self.timer.IsRunning():
-                    self.timer.Start(100)
+                self._register_active()
             else:
                 self._cleanup_after_failed_loop()
             
@@ -462,43 +613,47 @@ class SoundPlayer(wx.Panel):
         self.loop_mode = False
         self.is_playing = False
         self.is_paused = False
-        self.timer.Stop()
+        self._unregister_active()
         self.pause_button.Enable(False)
     
     def clear(self):
         """Clear the current audio file."""
-        self.stop()
-        self.current_file = None
-        self.pending_file = None
-        self.is_loaded = False
-        self.is_ready = False
-        self.file_label.SetLabel("No audio file loaded")
-        self.info_label.SetLabel("")
-        self.play_button.Enable(False)
-        self.play_loop_button.Enable(False)
-        self.pause_button.Enable(False)
-        self.stop_button.Enable(False)
-        self.loop_mode = False
-        self.is_restarting = False
-        self.progress_slider.Enable(False)
-        self.progress_slider.SetValue(0)
-        self.progress_slider.SetMax(100)
-        self.current_time_label.SetLabel("0:00")
-        self.total_time_label.SetLabel("0:00")
+        self.Freeze()
+        try:
+            self.stop()
+            self.current_file = None
+            self.pending_file = None
+            self.is_loaded = False
+            self.is_ready = False
+            self._preload_pending = False
+            self._load_generation += 1
+            self._cached_file_size = None
+            self.file_label.SetLabel("No audio file loaded")
+            self.info_label.SetLabel("")
+            self.play_button.Enable(False)
+            self.play_loop_button.Enable(False)
+            self.pause_button.Enable(False)
+            self.stop_button.Enable(False)
+            self.loop_mode = False
+            self.is_restarting = False
+            self.progress_slider.Enable(False)
+            self.progress_slider.SetValue(0)
+            self._last_pos_sec = 0
+            self.progress_slider.SetMax(100)
+            self.current_time_label.SetLabel("0:00")
+            self.total_time_label.SetLabel("0:00")
+        finally:
+            self.Thaw()
     
     @staticmethod
     def _format_time(milliseconds):
         """Format milliseconds to MM:SS format."""
-        seconds = milliseconds // 1000
-        minutes = seconds // 60
-        seconds = seconds % 60
+        minutes, seconds = divmod(milliseconds // 1000, 60)
         return f"{minutes}:{seconds:02d}"
     
     @staticmethod
     def _format_file_size(size_bytes):
         """Format file size in human-readable format."""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.1f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.1f} TB"
\ No newline at end of file
+        # Each unit spans 10 bits, so the bit length picks the unit without a division loop.
+        idx = max(0, min((size_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1))
+        return f"{size_bytes / (1 << (idx * 10)):.1f} {_SIZE_UNITS[idx]}"
\ No newline at end of file
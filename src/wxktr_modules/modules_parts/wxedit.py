@@ -9,6 +9,10 @@ import wx.stc as stc
 import sys
 import os
 from .editor_core import CodeEditor
+try:
+    from ..settings_io import write_atomic_bytes
+except ImportError:
+    from settings_io import write_atomic_bytes
 
 class Frame(wx.Frame):
     """A simple wx.Frame to host and demonstrate the CodeEditor."""
@@ -20,7 +24,11 @@ class Frame(wx.Frame):
             title = f"{os.path.basename(self.filepath)} - {title}"
         
         super().__init__(None, title=title, size=(900, 600))
+        self._base_title = title
+        self._shown_modified = False
         self.editor = CodeEditor(self, filepath=self.filepath)
+        # The editor picks its lexer from this path while loading.
+        self._lexer_path = self.editor.filepath
         
         self.Bind(wx.EVT_CLOSE, self.on_close)
         
@@ -33,11 +41,11 @@ class Frame(wx.Frame):
 
     def update_title(self):
         """Adds an asterisk to the title if the file is modified."""
-        title = self.GetTitle().lstrip('* ')
-        if self.editor.IsModified():
-            self.SetTitle(f"* {title}")
-        else:
-            self.SetTitle(title)
+        modified = self.editor.IsModified()
+        if modified == self._shown_modified:
+            return
+        self.SetTitle(f"* {self._base_title}" if modified else self._base_title)
+        self._shown_modified = modified
 
     def save_file(self) -> bool:
         """Saves the file, handling 'Save As' logic. Returns success."""
@@ -49,15 +57,21 @@ class Frame(wx.Frame):
                 self.filepath = dlg.GetPath()
                 self.editor.filepath = self.filepath
         
+        # Scintilla already holds the document as UTF-8; write those bytes as they are.
         try:
-            with open(self.filepath, 'w', encoding='utf-8', newline='') as f:
-                f.write(self.editor.GetText())
-            self.editor.SetSavePoint()
-            self.editor.guess_and_set_lexer(self.filepath)
-            return True
+            write_atomic_bytes(self.filepath, self.editor.GetTextRaw())
         except IOError as e:
             wx.LogError(f"Error saving file '{self.filepath}': {e}")
             return False
+        self._on_saved()
+        return True
+
+    def _on_saved(self):
+        """Marks the document clean and re-detects the lexer if the path changed."""
+        self.editor.SetSavePoint()
+        if self.filepath != self._lexer_path:
+            self.editor.guess_and_set_lexer(self.filepath)
+            self._lexer_path = self.filepath
 
     def on_close(self, event):
         """On closing, check for modifications and ask to save."""
@@ -4,8 +4,10 @@ import re
 import sys
 import os
 import select
-import glob
 import time
+import queue
+import codecs
+import traceback
 from collections import deque
 
 if sys.platform == 'win32':
@@ -21,6 +23,80 @@ else:
     except ImportError:
         ptyprocess = None
 
+# Window-title OSC sequences (dropped) and CSI sequences (params, command), split in one pass.
+_ESC_RE = re.compile(r'\x1b\]0;[^\x07\n]*\x07|\x1b\[([\d;?]*)(\w)')
+
+# SGR foreground codes and the colour each one selects, as a wx colour name or RGB.
+_ANSI_COLOURS = {
+    '30': 'BLACK', '31': 'RED', '32': 'GREEN', '33': 'YELLOW', '34': 'BLUE',
+    '35': 'MAGENTA', '36': 'CYAN', '37': 'LIGHT GREY', '90': (128, 128, 128),
+    '91': (255, 128, 128), '92': (128, 255, 128), '93': (255, 255, 128),
+    '94': (128, 128, 255), '95': (255, 128, 255), '96': (128, 255, 255), '97': 'WHITE',
+}
+# Output styles are (colour_code, bold) tuples so they can be worked out without wx.
+_DEFAULT_STYLE = (None, False)
+
+
+def _output_encoding():
+    """Encoding used to decode process output; sys.stdout is None in windowed builds."""
+    return getattr(sys.stdout, 'encoding', None) or 'utf-8'
+
+
+# Cursor-down/next-line sequences are rendered as newlines, at most 32 at a time.
+_NEWLINES = tuple('\n' * i for i in range(33))
+
+
+def _parse_ansi(text, style):
+    """Splits terminal output into styled runs, safe to call off the UI thread.
+
+    Returns a list of (style, text) runs, where a None entry means "clear the screen
+    back to the command header", and the style in effect at the end of the text.
+    """
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    if '\x1b' not in text:
+        # Plain output, the common case: one run in the current style.
+        return ([(style, text)] if text else []), style
+    parts = _ESC_RE.split(text)
+    ops = []
+    run = []
+    add = run.append
+    colours = _ANSI_COLOURS
+    for i in range(0, len(parts), 3):
+        if parts[i]:
+            add(parts[i])
+        if i + 2 >= len(parts):
+            break
+        params, command = parts[i+1], parts[i+2]
+        if command is None:
+            continue
+        if command == 'J' and params == '2':
+            # Everything before the clear would be removed again straight away.
+            ops.clear()
+            run.clear()
+            ops.append(None)
+        elif command == 'm':
+            colour, bold = style
+            codes = params.split(';')
+            if not params or '0' in codes:
+                colour, bold = _DEFAULT_STYLE
+            for code in codes:
+                if code in colours:
+                    colour = code
+                elif code == '1':
+                    bold = True
+            if (colour, bold) != style:
+                if run:
+                    ops.append((style, ''.join(run)))
+                    run.clear()
+                style = (colour, bold)
+        elif command in ('B', 'E'):
+            count = int(params) if params.isdigit() else 0
+            add(_NEWLINES[min(count, 32) or 1])
+    if run:
+        ops.append((style, ''.join(run)))
+    return ops, style
+
 
 class TerminalBackend:
     """Abstract base class for platform-specific terminal backends."""
@@ -124,59 +200,136 @@ class BashBackend(TerminalBackend):
         super().kill()
 
 
+# Directory listings for the path completer, keyed by directory and invalidated by its mtime.
+_DIR_CACHE = {}
+_DIR_CACHE_MAX = 64
+_DIR_CACHE_LOCK = threading.Lock()
+_PATH_CHARS = ('/', '\\', '.', '~')
+# Keys that may move the caret through read-only output while a command runs.
+_NAV_KEYS = frozenset({wx.WXK_LEFT, wx.WXK_RIGHT, wx.WXK_UP, wx.WXK_DOWN, wx.WXK_HOME, wx.WXK_END})
+
+
+def _entry_is_dir(entry):
+    """DirEntry.is_dir() that treats an unreadable entry as a file instead of failing the listing."""
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _list_dir(path):
+    """Returns (name, normcased name, is_dir) for the entries of `path`, directories first.
+
+    The listing is reused while the directory's mtime is unchanged, so typing in the
+    command box costs one stat per keystroke instead of a full directory scan.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    cached = _DIR_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with os.scandir(path) as it:
+        entries = [(e.name, os.path.normcase(e.name), _entry_is_dir(e)) for e in it]
+    entries.sort(key=lambda e: (not e[2], e[0].lower()))
+    with _DIR_CACHE_LOCK:
+        if len(_DIR_CACHE) >= _DIR_CACHE_MAX:
+            _DIR_CACHE.pop(next(iter(_DIR_CACHE)))
+        _DIR_CACHE[path] = (mtime, entries)
+    return entries
+
+
 class FilePathCompleter(wx.TextCompleterSimple):
-    """Custom autocompleter for file and directory paths."""
+    """Custom autocompleter for file and directory paths.
+
+    Directory listings are read on worker threads. A keystroke waits at most
+    _LIST_WAIT seconds for a listing it has not seen yet; a slower one lands in the
+    cache and shows up on the next keystroke. Cached listings are re-checked in the
+    background at most every _RECHECK_INTERVAL seconds.
+    """
+    _LIST_WAIT = 0.05
+    _RECHECK_INTERVAL = 1.0
     
     def __init__(self):
         """Initializes the FilePathCompleter."""
         super().__init__()
+        self._inflight = {}
+        self._checked = {}
+    
+    def _listing(self, search_dir):
+        """Returns the cached listing for search_dir, or None if it is not available yet."""
+        cached = _DIR_CACHE.get(search_dir)
+        now = time.monotonic()
+        if cached is not None:
+            if now - self._checked.get(search_dir, 0) > self._RECHECK_INTERVAL:
+                self._checked[search_dir] = now
+                self._start_listing(search_dir)
+            return cached[1]
+        self._checked[search_dir] = now
+        if not self._start_listing(search_dir).wait(self._LIST_WAIT):
+            return None
+        cached = _DIR_CACHE.get(search_dir)
+        return cached[1] if cached is not None else None
+    
+    def _start_listing(self, search_dir):
+        """Starts a worker listing search_dir unless one is already running; returns its done event."""
+        done = self._inflight.get(search_dir)
+        if done is None:
+            done = self._inflight[search_dir] = threading.Event()
+            thread = threading.Thread(target=self._listing_thread, args=(search_dir, done), daemon=True)
+            thread.start()
+        return done
+    
+    def _listing_thread(self, search_dir, done):
+        """Refreshes the cached listing of search_dir off the UI thread."""
+        try:
+            _list_dir(search_dir)
+        except OSError:
+            with _DIR_CACHE_LOCK:
+                _DIR_CACHE.pop(search_dir, None)
+        finally:
+            self._inflight.pop(search_dir, None)
+            done.set()
         
     def GetCompletions(self, prefix):
         """Return list of file/directory completions for the given prefix."""
         completions = []
         
-        if not prefix:
-            prefix = "./"
+        # Nothing typed yet, or a new word just started: there is no path to complete.
+        if not prefix or prefix[-1].isspace():
+            return completions
         
         parts = prefix.split()
-        if len(parts) == 0:
-            path_prefix = ""
-        else:
-            path_prefix = parts[-1]
+        path_prefix = parts[-1]
+        # Skip words that cannot be paths, such as options, pipes or variables.
+        first = path_prefix[0]
+        if not (first.isalnum() or first == '_' or any(c in path_prefix for c in _PATH_CHARS)):
+            return completions
         
         if os.path.isdir(path_prefix):
             search_dir = path_prefix
-            if not search_dir.endswith(os.sep):
-                search_pattern = os.path.join(search_dir, "*")
-            else:
-                search_pattern = os.path.join(search_dir, "*")
-            base_prefix = path_prefix
+            filename_start = ""
         else:
             search_dir = os.path.dirname(path_prefix) or "."
             filename_start = os.path.basename(path_prefix)
-            search_pattern = os.path.join(search_dir, filename_start + "*")
-            base_prefix = os.path.dirname(path_prefix)
         
-        try:
-            matches = glob.glob(search_pattern)
-            
-            matches.sort(key=lambda x: (not os.path.isdir(x), x.lower()))
-            
-            for match in matches[:50]:
-                if os.path.isdir(match):
-                    display_path = match + os.sep
-                else:
-                    display_path = match
-                
-                if len(parts) > 1:
-                    completion = " ".join(parts[:-1]) + " " + display_path
-                else:
-                    completion = display_path
-                
-                completions.append(completion)
-                
-        except (OSError, PermissionError):
-            pass
+        entries = self._listing(search_dir)
+        if entries is None:
+            return completions
+        
+        # Same matching as the shell glob it replaces: case follows the platform and
+        # hidden entries are only offered once the typed name starts with a dot.
+        match_start = os.path.normcase(filename_start)
+        show_hidden = filename_start.startswith('.')
+        lead = " ".join(parts[:-1]) + " " if len(parts) > 1 else ""
+        
+        for name, key, is_dir in entries:
+            if not key.startswith(match_start) or (name[0] == '.' and not show_hidden):
+                continue
+            display_path = os.path.join(search_dir, name)
+            if is_dir:
+                display_path += os.sep
+            completions.append(lead + display_path)
+            if len(completions) == 50:
+                break
         
         return completions
 
@@ -289,9 +442,9 @@ class PreCommandDialog(wx.Dialog):
         separator_map = {0: "&&", 1: ";", 2: "|"}
         separator = separator_map.get(self.separator_choice.GetSelection(), "&&")
         
-        for sep in ["&&", ";", "|", "&"]:
-            if precommand.rstrip().endswith(sep):
-                return precommand.strip()
+        # Already ends in a separator ("&&" ends in "&"); precommand is stripped above.
+        if precommand.endswith(("&", ";", "|")):
+            return precommand
         
         return f"{precommand} {separator}"
     
@@ -391,6 +544,10 @@ class HistoryPanel(wx.Panel):
         super().__init__(parent)
         self.controller = controller
         self.project_settings = project_settings
+        self._shown_version = None
+        # Mirror of the listbox rows, newest first, so edits don't re-read the settings.
+        self._cache = deque()
+        self._cached_commands = set()
         
         self.label = wx.StaticText(self, label="Command History:")
         self.history_list = wx.ListBox(self, style=wx.LB_SINGLE)
@@ -422,14 +579,22 @@ class HistoryPanel(wx.Panel):
         """Delete the selected history item."""
         selection_index = self.history_list.GetSelection()
         if selection_index != wx.NOT_FOUND:
-            command_to_delete = self.history_list.GetString(selection_index)
+            if self._shown_version != self.project_settings.history_version:
+                # The history changed elsewhere; filter the stored list and redraw.
+                command_to_delete = self.history_list.GetString(selection_index)
+                current_history = self.project_settings.get_terminal_history()
+                new_history = [cmd for cmd in current_history if cmd != command_to_delete]
+                self.project_settings.set_terminal_history(new_history)
+                self.update_ui()
+                return
             
-            current_history = self.project_settings.get_terminal_history()
-            new_history = [cmd for cmd in current_history if cmd != command_to_delete]
+            self._cached_commands.discard(self._cache[selection_index])
+            del self._cache[selection_index]
+            self.history_list.Delete(selection_index)
             
-            self.project_settings.set_terminal_history(new_history)
-            
-            self.load_history()
+            # Settings keep the oldest command first.
+            self.project_settings.set_terminal_history(list(reversed(self._cache)))
+            self._shown_version = self.project_settings.history_version
 
     def on_select(self, event):
         """Handles single-click selection in the history list."""
@@ -443,17 +608,47 @@ class HistoryPanel(wx.Panel):
 
     def add_to_history(self, command):
         """Adds a command to the history list."""
+        stale = self._shown_version != self.project_settings.history_version
+        cache = self._cache
+        if not stale and cache and cache[0] == command:
+            # Re-running the newest command changes nothing, so skip the settings write.
+            return
         self.project_settings.add_to_terminal_history(command)
-        self.load_history()
+        if stale:
+            self.update_ui()
+            return
+        
+        # Mirror the settings update in place: newest first, no duplicates, capped length.
+        if command in self._cached_commands:
+            existing = cache.index(command)
+            del cache[existing]
+            self.history_list.Delete(existing)
+        else:
+            if len(cache) == cache.maxlen:
+                self._cached_commands.discard(cache[-1])
+                self.history_list.Delete(len(cache) - 1)
+            self._cached_commands.add(command)
+        cache.appendleft(command)
+        self.history_list.Insert(command, 0)
+        self._shown_version = self.project_settings.history_version
 
     def update_ui(self):
         """Updates the listbox with the current history."""
         history = self.project_settings.get_terminal_history()
-        self.history_list.SetItems(history[::-1])
+        history.reverse()
+        max_history = self.project_settings.get_terminal_max_history()
+        if max_history:
+            # The limit may have been lowered since the history was last written.
+            del history[max_history:]
+        self._cache = deque(history, maxlen=max_history or None)
+        self._cached_commands = set(history)
+        self.history_list.SetItems(history)
+        self._shown_version = self.project_settings.history_version
 
     def load_history(self):
-        """Loads and displays the command history."""
-        self.update_ui()
+        """Loads and displays the command history, unless the list already shows it."""
+        if self._shown_version != self.project_settings.history_version:
+            self.update_ui()
 
     def save_history(self):
         """Saves the command history (handled by project_settings)."""
@@ -465,17 +660,25 @@ class HistoryPanel(wx.Panel):
 
 class OutputPanel(wx.Panel):
     """A panel that displays the terminal output with ANSI color support."""
+    # wx colours for _ANSI_COLOURS, shared by all panels; built on first use since wx.Colour needs the app.
+    ANSI_MAP = None
+    _FLUSH_SIZE = 65536
+    _FLUSH_INTERVAL = 0.03
+    _SELECT_TIMEOUT = 0.25
+    _READ_SIZE = 65536
+    _MAX_OUTPUT_CHARS = 2 * 1024 * 1024
+    _TRIM_OUTPUT_CHARS = 3 * 512 * 1024
+    _MAX_OUTPUT_LINES = 5000
+    _TRIM_OUTPUT_LINES = 4000
+
     def __init__(self, parent):
         """Initializes the OutputPanel."""
         super().__init__(parent)
-        self.ANSI_MAP = {
-            '30': wx.Colour('BLACK'), '31': wx.Colour('RED'), '32': wx.Colour('GREEN'),
-            '33': wx.Colour('YELLOW'), '34': wx.Colour('BLUE'), '35': wx.Colour('MAGENTA'),
-            '36': wx.Colour('CYAN'), '37': wx.Colour('LIGHT GREY'), '90': wx.Colour(128, 128, 128),
-            '91': wx.Colour(255, 128, 128), '92': wx.Colour(128, 255, 128), '93': wx.Colour(255, 255, 128),
-            '94': wx.Colour(128, 128, 255), '95': wx.Colour(255, 128, 255), '96': wx.Colour(128, 255, 255),
-            '97': wx.Colour('WHITE'),
-        }
+        if OutputPanel.ANSI_MAP is None:
+            OutputPanel.ANSI_MAP = {
+                code: wx.Colour(*spec) if isinstance(spec, tuple) else wx.Colour(spec)
+                for code, spec in _ANSI_COLOURS.items()
+            }
         self.output_ctrl = wx.TextCtrl(self, style=wx.TE_MULTILINE | wx.TE_RICH2 | wx.TE_PROCESS_ENTER)
         self.copy_button = wx.Button(self, label="Copy Output")
 
@@ -483,7 +686,10 @@ class OutputPanel(wx.Panel):
         self.output_ctrl.SetFont(font)
         self.output_ctrl.SetBackgroundColour(wx.Colour(0, 0, 0))
         self.default_style = wx.TextAttr(wx.Colour(200, 200, 200), wx.Colour(0, 0, 0), font)
-        self.current_style = wx.TextAttr(self.default_style)
+        self.current_style = _DEFAULT_STYLE
+        # wx.TextAttr per style tuple, built on first use.
+        self._attr_cache = {_DEFAULT_STYLE: self.default_style}
+        self.header_style = wx.TextAttr(wx.Colour(128, 255, 255), wx.Colour(0, 0, 0), font)
         self.output_ctrl.SetDefaultStyle(self.default_style)
 
         sizer = wx.BoxSizer(wx.VERTICAL)
@@ -496,7 +702,11 @@ class OutputPanel(wx.Panel):
 
         self.input_start_pos = 0
         self.command_header_end_pos = 0
+        self._output_lines = 0
         self.backend = None
+        # One reader thread per panel, started with the first command and fed from a queue.
+        self._jobs = queue.SimpleQueue()
+        self._reader = None
         self.is_running = False
         self.stop_requested = False
 
@@ -504,113 +714,210 @@ class OutputPanel(wx.Panel):
         self.output_ctrl.Bind(wx.EVT_TEXT_ENTER, self.on_text_enter)
         self.copy_button.Bind(wx.EVT_BUTTON, self.on_copy)
 
-    def reader_thread_loop(self, controller):
-        """Reads output from the backend process in a separate thread."""
+    def reader_thread_loop(self, backend, controller):
+        """Reads output from the backend process in a separate thread.
+
+        The loop stops once `backend` is no longer the panel's current backend, so a
+        run that was stopped or replaced never reads or closes the next one.
+        """
+        # Reads are queued and handed to the UI thread in batches, at most every
+        # _FLUSH_INTERVAL seconds or _FLUSH_SIZE characters, and whenever output pauses.
+        # Each batch is decoded and split into styled runs here, so the UI thread only appends.
+        chunks = deque()
+        size = 0
+        last_flush = time.monotonic()
+        style = _DEFAULT_STYLE
+        # Created on the first bytes chunk; the winpty backend already returns str.
+        decoder = None
+
+        def flush():
+            nonlocal size, last_flush, style, decoder
+            if chunks:
+                data = chunks[0][:0].join(chunks)
+                chunks.clear()
+                size = 0
+                if isinstance(data, bytes):
+                    if decoder is None:
+                        decoder = codecs.getincrementaldecoder(_output_encoding())(errors='replace')
+                    data = decoder.decode(data)
+                if data:
+                    ops, style = _parse_ansi(data, style)
+                    wx.CallAfter(self._apply_runs, ops, style)
+            last_flush = time.monotonic()
+
+        def push(chunk):
+            nonlocal size
+            if chunk:
+                chunks.append(chunk)
+                size += len(chunk)
+            if not chunk or size >= self._FLUSH_SIZE or time.monotonic() - last_flush > self._FLUSH_INTERVAL:
+                flush()
+
         try:
             if sys.platform == 'win32':
-                buffer = ''
-                while self.backend and self.backend.isalive():
+                while self.backend is backend and backend.isalive():
                     if self.stop_requested:
-                        try: self.backend.kill()
+                        try: backend.kill()
                         except Exception: pass
                         break
                     
                     try:
-                        chunk = self.backend.read()
-                        if chunk:
-                            buffer += chunk
-                        else:
+                        chunk = backend.read()
+                        push(chunk)
+                        if not chunk:
                             time.sleep(0.02)
-
-                        if buffer and ('\n' in buffer or '\r' in buffer or not chunk):
-                            wx.CallAfter(self.process_incoming_text, buffer)
-                            buffer = ''
                     except (OSError, EOFError):
                         break
-                if buffer:
-                    wx.CallAfter(self.process_incoming_text, buffer)
             
             else:
-                fd = self.backend.fileno() if self.backend and hasattr(self.backend, 'fileno') else None
-                while self.backend and self.backend.isalive():
+                fd = backend.fileno() if hasattr(backend, 'fileno') else None
+                while self.backend is backend and backend.isalive():
                     if self.stop_requested:
-                        try: self.backend.kill()
+                        try: backend.kill()
                         except Exception: pass
                         break
                     try:
-                        if fd and select.select([fd], [], [], 0.1)[0]:
-                            output = self.backend.read()
-                            if output:
-                                wx.CallAfter(self.process_incoming_text, output)
-                        else:
-                            output = self.backend.read()
-                            if output:
-                                wx.CallAfter(self.process_incoming_text, output)
-
+                        if fd is None:
+                            push(backend.read())
+                            continue
+                        # Wait long when idle, but only briefly while a batch is pending.
+                        timeout = self._FLUSH_INTERVAL if chunks else self._SELECT_TIMEOUT
+                        if not select.select([fd], [], [], timeout)[0]:
+                            flush()
+                            continue
+                        chunk = os.read(fd, self._READ_SIZE)
+                        if not chunk:
+                            break
+                        push(chunk)
                     except (OSError, EOFError):
                         break
+                # The process can exit with output still queued in the pty; read it out.
+                if fd is not None and self.backend is backend and not self.stop_requested:
+                    try:
+                        while select.select([fd], [], [], 0)[0]:
+                            chunk = os.read(fd, self._READ_SIZE)
+                            if not chunk:
+                                break
+                            push(chunk)
+                    except OSError:
+                        pass
 
         except Exception as e:
+            flush()
             wx.CallAfter(self.process_incoming_text, f"\nError in reader thread: {e}\n")
         finally:
-            self.is_running = False
-            if self.backend:
-                try:
-                    self.backend.close(force=False)
-                except Exception:
-                    pass
+            try:
+                backend.close(force=False)
+            except Exception:
+                pass
+            # Leave the panel alone if a newer command has already taken over.
+            if self.backend is None or self.backend is backend:
+                flush()
+                self.is_running = False
                 self.backend = None
-            wx.CallAfter(controller.set_controls_enabled, True)
-            status_msg = "\n--- Process Stopped ---\n" if self.stop_requested else "\n--- Process Finished ---\n"
-            wx.CallAfter(self.process_incoming_text, status_msg)
-            self.stop_requested = False
+                wx.CallAfter(controller.set_controls_enabled, True)
+                status_msg = "\n--- Process Stopped ---\n" if self.stop_requested else "\n--- Process Finished ---\n"
+                wx.CallAfter(self.process_incoming_text, status_msg)
+                self.stop_requested = False
+
+    def _reader_worker(self):
+        """Runs queued reader jobs one after another; a None job ends the worker."""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            backend, controller = job
+            try:
+                self.reader_thread_loop(backend, controller)
+            except Exception:
+                # Keep the worker alive for the next command and release this one.
+                print("Unhandled exception in terminal reader:")
+                traceback.print_exc()
+                if self.backend is None or self.backend is backend:
+                    self.is_running = False
+                    self.backend = None
+                    self.stop_requested = False
+                    wx.CallAfter(controller.set_controls_enabled, True)
 
     def process_incoming_text(self, text):
         """Processes and displays incoming text, handling ANSI escape codes."""
         if not text: return
         
         if isinstance(text, bytes):
-            text = text.decode(sys.stdout.encoding or 'utf-8', errors='replace')
-        
-        text = re.sub(r'\r\n?', '\n', text)
-        
-        text = re.sub(r'\x1b\]0;.*?\x07', '', text)
+            text = text.decode(_output_encoding(), errors='replace')
         
-        csi_pattern = re.compile(r'\x1b\[([\d;?]*)(\w)')
-        parts = csi_pattern.split(text)
-        self.output_ctrl.SetInsertionPointEnd()
-        
-        for i in range(0, len(parts), 3):
-            normal_text = parts[i]
-            if normal_text:
-                self.output_ctrl.SetDefaultStyle(self.current_style)
-                self.output_ctrl.AppendText(normal_text)
-            
-            if i + 2 < len(parts):
-                params, command = parts[i+1], parts[i+2]
-                if command == 'J' and params == '2':
-                    current_pos = self.output_ctrl.GetLastPosition()
+        ops, style = _parse_ansi(text, self.current_style)
+        self._apply_runs(ops, style)
+
+    def _apply_runs(self, ops, style):
+        """Appends runs produced by _parse_ansi and records the style they end in.
+
+        The control is frozen so the whole batch repaints once.
+        """
+        self.current_style = style
+        if not ops:
+            return
+        ctrl = self.output_ctrl
+        set_style, append, style_attr = ctrl.SetDefaultStyle, ctrl.AppendText, self._style_attr
+        ctrl.Freeze()
+        try:
+            ctrl.SetInsertionPointEnd()
+            lines = self._output_lines
+            for op in ops:
+                if op is None:
+                    lines = 0
+                    current_pos = ctrl.GetLastPosition()
                     if current_pos > self.command_header_end_pos:
-                        self.output_ctrl.Remove(self.command_header_end_pos, current_pos)
-                        self.output_ctrl.SetInsertionPoint(self.command_header_end_pos)
-                elif command == 'm':
-                    codes = params.split(';')
-                    if not params or '0' in codes:
-                        self.current_style = wx.TextAttr(self.default_style)
-                    for code in codes:
-                        if code in self.ANSI_MAP:
-                            self.current_style.SetTextColour(self.ANSI_MAP[code])
-                        elif code == '1':
-                            self.current_style.SetFontWeight(wx.FONTWEIGHT_BOLD)
-                elif command in ('B', 'E'):
-                    count = 1
-                    if params.isdigit() and int(params) > 0:
-                        count = int(params)
-                    self.output_ctrl.AppendText('\n' * count)
-                            
-        self.input_start_pos = self.output_ctrl.GetLastPosition()
-        self.output_ctrl.SetInsertionPoint(self.input_start_pos)
-        self.output_ctrl.ShowPosition(self.input_start_pos)
+                        ctrl.Remove(self.command_header_end_pos, current_pos)
+                        ctrl.SetInsertionPoint(self.command_header_end_pos)
+                    continue
+                run_style, run_text = op
+                set_style(style_attr(run_style))
+                append(run_text)
+                lines += run_text.count('\n')
+            self._output_lines = lines
+            
+            self._trim_output()
+            self.input_start_pos = ctrl.GetLastPosition()
+            ctrl.SetInsertionPoint(self.input_start_pos)
+        finally:
+            ctrl.Thaw()
+        ctrl.ShowPosition(self.input_start_pos)
+
+    def _style_attr(self, style):
+        """Returns the wx.TextAttr for a (colour_code, bold) style tuple."""
+        attr = self._attr_cache.get(style)
+        if attr is None:
+            colour, bold = style
+            attr = wx.TextAttr(self.default_style)
+            if colour is not None:
+                attr.SetTextColour(self.ANSI_MAP[colour])
+            if bold:
+                attr.SetFontWeight(wx.FONTWEIGHT_BOLD)
+            self._attr_cache[style] = attr
+        return attr
+
+    def _trim_output(self):
+        """Drops the oldest command output once the control holds more than
+        _MAX_OUTPUT_LINES lines or _MAX_OUTPUT_CHARS characters.
+
+        The command header is kept; output is trimmed back to _TRIM_OUTPUT_LINES and
+        _TRIM_OUTPUT_CHARS so the removal does not repeat on every chunk. Lines are
+        counted as they are appended, so the control is only asked for line positions
+        when a trim is actually due.
+        """
+        start = self.command_header_end_pos
+        if self._output_lines > self._MAX_OUTPUT_LINES:
+            lines = self.output_ctrl.GetNumberOfLines()
+            first_kept = self.output_ctrl.XYToPosition(0, lines - self._TRIM_OUTPUT_LINES)
+            if first_kept > start:
+                self.output_ctrl.Remove(start, first_kept)
+            self._output_lines = self._TRIM_OUTPUT_LINES
+        last = self.output_ctrl.GetLastPosition()
+        if last <= self._MAX_OUTPUT_CHARS:
+            return
+        self.output_ctrl.Remove(start, start + last - self._TRIM_OUTPUT_CHARS)
+        self._output_lines = self.output_ctrl.GetNumberOfLines() - 1
 
     def execute_command(self, command, controller, precommand=""):
         """Executes a command in a new terminal process."""
@@ -623,28 +930,29 @@ class OutputPanel(wx.Panel):
         self.output_ctrl.Clear()
         self.input_start_pos = 0
         self.command_header_end_pos = 0
+        self._output_lines = 0
         
         full_command = f"{precommand} {command}" if precommand else command
         
         prompt_char = '>' if sys.platform == 'win32' else '$'
         
         command_header = f"{prompt_char} {command}\n"
-        header_style = wx.TextAttr(wx.Colour(128, 255, 255), wx.Colour(0, 0, 0), self.output_ctrl.GetFont())
-        self.output_ctrl.SetDefaultStyle(header_style)
+        self.output_ctrl.SetDefaultStyle(self.header_style)
         self.output_ctrl.AppendText(command_header)
         
         self.command_header_end_pos = self.output_ctrl.GetLastPosition()
         
         self.output_ctrl.SetDefaultStyle(self.default_style)
-        self.current_style = wx.TextAttr(self.default_style)
+        self.current_style = _DEFAULT_STYLE
         self.input_start_pos = self.command_header_end_pos
         
         try:
             self.backend = CmdBackend() if sys.platform == 'win32' else BashBackend()
             self.backend.spawn(full_command)
-            thread = threading.Thread(target=self.reader_thread_loop, args=(controller,))
-            thread.daemon = True
-            thread.start()
+            if self._reader is None:
+                self._reader = threading.Thread(target=self._reader_worker, daemon=True)
+                self._reader.start()
+            self._jobs.put((self.backend, controller))
         except Exception as e:
             self.output_ctrl.AppendText(f"\nError starting process: {e}")
             self.is_running = False
@@ -681,11 +989,9 @@ class OutputPanel(wx.Panel):
     def on_key_press(self, event):
         """Handles key presses to manage input area protection."""
         if not self.is_running: event.Skip(); return
-        pos, key = self.output_ctrl.GetInsertionPoint(), event.GetKeyCode()
-        if pos < self.input_start_pos or (key == wx.WXK_BACK and pos <= self.input_start_pos):
-                 if key not in [wx.WXK_LEFT, wx.WXK_RIGHT, wx.WXK_UP, wx.WXK_DOWN, wx.WXK_HOME, wx.WXK_END]:
-                     return
-        event.Skip()
+        pos, key, start = self.output_ctrl.GetInsertionPoint(), event.GetKeyCode(), self.input_start_pos
+        if pos > start or (pos == start and key != wx.WXK_BACK) or key in _NAV_KEYS:
+            event.Skip()
 
     def on_copy(self, event):
         """Handles the 'Copy Output' button click."""
@@ -696,6 +1002,9 @@ class OutputPanel(wx.Panel):
     def shutdown(self):
         if self.backend and self.backend.isalive():
             self.backend.close()
+        if self._reader is not None:
+            self._jobs.put(None)
+            self._reader = None
 
 class TerminalPanel(wx.Panel):
     """The main terminal widget, combining input, output, and history panels."""
@@ -765,12 +1074,8 @@ class TerminalPanel(wx.Panel):
         dialog.Destroy()
     
     def load_precommand(self):
-        """Loads the raw pre-command and prepares it for execution."""
-        raw_precommand = self.project_settings.get_terminal_pre_command()
-        if raw_precommand:
-            self.precommand = f"{raw_precommand} &&"
-        else:
-            self.precommand = ""
+        """Loads the pre-command, already formatted for execution by the project settings."""
+        self.precommand = self.project_settings.get_terminal_pre_command_formatted()
     
     def save_precommand(self, raw_precommand):
         """Saves the raw pre-command to project settings."""
@@ -779,6 +1084,7 @@ class TerminalPanel(wx.Panel):
     def shutdown(self):
         """Shuts down the terminal backend process."""
         self.output_panel.shutdown()
+        self.project_settings.flush()
 
 class TerminalFrame(wx.Frame):
     """A simple wx.Frame to host and demonstrate the TerminalPanel."""
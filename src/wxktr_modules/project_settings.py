@@ -7,7 +7,7 @@ Project Settings Manager
 Manages project-specific settings that are stored within the project directory.
 
 This module handles:
-- .ktrsettings file (INI format) containing:
+- .ktrsettings file (INI format, list values as JSON arrays) containing:
   - wxterm command history
   - wxterm pre-command
   - treeview expansion state
@@ -17,9 +17,70 @@ Note: .context files are managed separately by the context generator modules.
 """
 
 import os
-import configparser
+import re
+import sys
+import json
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Dict, FrozenSet, List, Optional, Set
+
+try:
+    from .settings_io import SaveScheduler, write_atomic
+except ImportError:
+    from settings_io import SaveScheduler, write_atomic
+
+
+# The subset of configparser's INI syntax that .ktrsettings uses.
+_SECTION_RE = re.compile(r'\[(?P<header>.+)\]')
+_OPTION_RE = re.compile(r'(?P<option>.*?)\s*[=:]\s*(?P<value>.*)$')
+
+
+def _parse_ini(text: str) -> Dict[str, Dict[str, str]]:
+    """
+    Parse INI text as written by configparser into {section: {option: value}}.
+    
+    Supports section headers, `key = value` options, full-line `#`/`;` comments and
+    indented continuation lines for multi-line values. Unparseable lines are skipped.
+    """
+    sections: Dict[str, Dict[str, List[str]]] = {}
+    current = None
+    value_lines = None
+    indent = 0
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            if value_lines is not None:
+                value_lines.append('')
+            continue
+        if stripped[0] in '#;':
+            continue
+        line_indent = len(line) - len(line.lstrip())
+        if value_lines is not None and line_indent > indent:
+            value_lines.append(stripped)
+            continue
+        indent = line_indent
+        match = _SECTION_RE.match(stripped)
+        if match:
+            current = sections.setdefault(match.group('header'), {})
+            value_lines = None
+            continue
+        match = _OPTION_RE.match(stripped) if current is not None else None
+        if match and match.group('option'):
+            value_lines = [match.group('value')]
+            current[match.group('option').lower()] = value_lines
+    return {name: {key: '\n'.join(lines).rstrip() for key, lines in options.items()}
+            for name, options in sections.items()}
+
+
+def _format_ini(sections: Dict[str, Dict[str, str]]) -> str:
+    """Serialize {section: {option: value}} in the same layout configparser writes."""
+    parts = []
+    for name, options in sections.items():
+        parts.append(f"[{name}]\n")
+        for key, value in options.items():
+            value = value.replace('\n', '\n\t')
+            parts.append(f"{key} = {value}\n")
+        parts.append("\n")
+    return ''.join(parts)
 
 
 class ProjectSettings:
@@ -27,51 +88,130 @@ class ProjectSettings:
     
     SETTINGS_FILENAME = ".ktrsettings"
     
-    def __init__(self, project_path: str):
+    def __init__(self, project_path: str, resolve_symlinks: bool = False):
         """
         Initialize project settings for a given project directory.
         
         Args:
             project_path: Path to the project root directory
+            resolve_symlinks: Canonicalize project_path by resolving symlinks; by
+                default it is only made absolute
         """
-        self.project_path = Path(project_path).resolve()
+        if resolve_symlinks:
+            self.project_path = Path(project_path).resolve()
+        else:
+            self.project_path = Path(os.path.abspath(project_path))
         self.settings_file = self.project_path / self.SETTINGS_FILENAME
         
-        self.config = configparser.ConfigParser()
+        self._data: Dict[str, Dict[str, str]] = {}
+        # Bumped on every history write so views can tell whether their copy is stale.
+        self.history_version = 0
+        # Setters only mark the file dirty; it is written once changes settle.
+        self._save_scheduler = SaveScheduler(self._serialize, self._write)
         
         self.load()
     
     def load(self) -> None:
         """Load settings from .ktrsettings file if it exists."""
-        if self.settings_file.exists():
+        self.history_version += 1
+        try:
+            with open(self.settings_file, 'r', encoding='utf-8') as f:
+                self._data = _parse_ini(f.read())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: Could not load {self.SETTINGS_FILENAME}: {e}")
+        self._initialize_defaults()
+        self._load_cache()
+        self._save_scheduler.mark_saved(self._serialize())
+    
+    def _load_cache(self) -> None:
+        """Parse the stored values once so the getters only return attributes."""
+        terminal = self._data['Terminal']
+        try:
+            self._max_history = int(terminal.get('max_history', 100))
+        except ValueError:
+            self._max_history = 100
+        self._set_history_cache(self._decode_list(terminal.get('history', '')))
+        self._set_pre_command_cache(terminal.get('pre_command', ''))
+        self._set_expanded_paths_cache(self._decode_list(
+            self._data['TreeView'].get('expanded_paths', '')))
+    
+    def _set_history_cache(self, history: List[str]) -> None:
+        """
+        Set the cached history.
+        
+        The history is kept as an insertion-ordered dict (oldest first) with the
+        commands as keys, so re-adding a command is a pop and an insert.
+        """
+        self._history: Dict[str, None] = dict.fromkeys(history)
+    
+    def _set_expanded_paths_cache(self, paths) -> None:
+        """Set the cached expanded paths as an immutable set of interned strings."""
+        self._expanded_paths = frozenset(sys.intern(path) for path in paths)
+    
+    def _set_pre_command_cache(self, pre_command: str) -> None:
+        """Set the cached pre-command and its ready-to-prepend form."""
+        self._pre_command = pre_command
+        self._pre_command_formatted = f"{pre_command} &&" if pre_command else ""
+    
+    @staticmethod
+    def _decode_list(value: str) -> List[str]:
+        """
+        Decode a stored list value.
+        
+        Lists are stored as a JSON array on a single line. Files written by older
+        versions hold one entry per line instead, which is still accepted.
+        """
+        if value.startswith('['):
             try:
-                self.config.read(self.settings_file, encoding='utf-8')
-            except Exception as e:
-                print(f"Warning: Could not load {self.SETTINGS_FILENAME}: {e}")
-                self._initialize_defaults()
-        else:
-            self._initialize_defaults()
+                items = json.loads(value)
+                if isinstance(items, list):
+                    return [str(item) for item in items]
+            except ValueError:
+                pass
+        return [line.strip() for line in value.split('\n') if line.strip()]
+    
+    @staticmethod
+    def _encode_list(items: List[str]) -> str:
+        """Encode a list value as a single-line JSON array."""
+        return json.dumps(items, ensure_ascii=False)
     
     def _initialize_defaults(self) -> None:
-        """Initialize default sections and values."""
-        if not self.config.has_section('Terminal'):
-            self.config.add_section('Terminal')
-            self.config.set('Terminal', 'history', '')
-            self.config.set('Terminal', 'pre_command', '')
-            self.config.set('Terminal', 'max_history', '100')
+        """
+        Initialize default sections and values.
         
-        if not self.config.has_section('TreeView'):
-            self.config.add_section('TreeView')
-            self.config.set('TreeView', 'expanded_paths', '')
+        Called on every load, so both sections always exist afterwards.
+        """
+        if 'Terminal' not in self._data:
+            self._data['Terminal'] = {'history': '[]', 'pre_command': '', 'max_history': '100'}
+        
+        if 'TreeView' not in self._data:
+            self._data['TreeView'] = {'expanded_paths': '[]'}
     
     def save(self) -> None:
         """Save settings to .ktrsettings file."""
+        content = self._serialize()
+        self._write(content)
+        self._save_scheduler.mark_saved(content)
+    
+    def _serialize(self) -> str:
+        """Return the settings as .ktrsettings file content."""
+        # List values are only kept in their caches between saves; encode them here.
+        self._data['Terminal']['history'] = self._encode_list(list(self._history))
+        self._data['TreeView']['expanded_paths'] = self._encode_list(sorted(self._expanded_paths))
+        return _format_ini(self._data)
+    
+    def _write(self, content: str) -> None:
+        """Write serialized settings to the .ktrsettings file."""
         try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                self.config.write(f)
+            write_atomic(self.settings_file, content)
         except IOError as e:
             print(f"Error: Could not save {self.SETTINGS_FILENAME}: {e}")
     
+    def flush(self) -> None:
+        """Write any pending changes to disk now."""
+        self._save_scheduler.flush(wait=True)
     
     def get_terminal_history(self) -> List[str]:
         """
@@ -80,14 +220,7 @@ class ProjectSettings:
         Returns:
             List of command strings from history
         """
-        if not self.config.has_section('Terminal'):
-            return []
-        
-        history_str = self.config.get('Terminal', 'history', fallback='')
-        if not history_str:
-            return []
-        
-        return [cmd.strip() for cmd in history_str.split('\n') if cmd.strip()]
+        return list(self._history)
     
     def set_terminal_history(self, commands: List[str]) -> None:
         """
@@ -96,33 +229,29 @@ class ProjectSettings:
         Args:
             commands: List of command strings to save
         """
-        if not self.config.has_section('Terminal'):
-            self.config.add_section('Terminal')
-        
-        max_history = self.config.getint('Terminal', 'max_history', fallback=100)
+        self._set_history_cache(commands[-self._max_history:])
+        self.history_version += 1
         
-        commands = commands[-max_history:]
-        
-        history_str = '\n'.join(commands)
-        self.config.set('Terminal', 'history', history_str)
-        
-        self.save()
+        self._save_scheduler.schedule()
     
     def add_to_terminal_history(self, command: str) -> None:
         """
         Add a command to terminal history.
         
+        Only the in-memory history is updated here; it is encoded when the
+        settings are saved.
+        
         Args:
             command: Command string to add
         """
-        history = self.get_terminal_history()
+        history = self._history
+        history.pop(command, None)
+        history[command] = None
+        while self._max_history and len(history) > self._max_history:
+            del history[next(iter(history))]
         
-        if command in history:
-            history.remove(command)
-        
-        history.append(command)
-        
-        self.set_terminal_history(history)
+        self.history_version += 1
+        self._save_scheduler.schedule()
     
     def get_terminal_pre_command(self) -> str:
         """
@@ -131,10 +260,16 @@ class ProjectSettings:
         Returns:
             Pre-command string (empty if not set)
         """
-        if not self.config.has_section('Terminal'):
-            return ''
+        return self._pre_command
+    
+    def get_terminal_pre_command_formatted(self) -> str:
+        """
+        Get the pre-command ready to be prepended to a command.
         
-        return self.config.get('Terminal', 'pre_command', fallback='')
+        Returns:
+            Pre-command followed by "&&" (empty if not set)
+        """
+        return self._pre_command_formatted
     
     def set_terminal_pre_command(self, pre_command: str) -> None:
         """
@@ -143,42 +278,29 @@ class ProjectSettings:
         Args:
             pre_command: Command to execute on terminal start
         """
-        if not self.config.has_section('Terminal'):
-            self.config.add_section('Terminal')
-        
-        self.config.set('Terminal', 'pre_command', pre_command)
-        self.save()
+        self._data['Terminal']['pre_command'] = pre_command
+        self._set_pre_command_cache(pre_command)
+        self._save_scheduler.schedule()
     
     def get_terminal_max_history(self) -> int:
         """Get maximum number of history entries to keep."""
-        if not self.config.has_section('Terminal'):
-            return 100
-        
-        return self.config.getint('Terminal', 'max_history', fallback=100)
+        return self._max_history
     
     def set_terminal_max_history(self, max_history: int) -> None:
         """Set maximum number of history entries to keep."""
-        if not self.config.has_section('Terminal'):
-            self.config.add_section('Terminal')
-        
-        self.config.set('Terminal', 'max_history', str(max_history))
-        self.save()
+        self._data['Terminal']['max_history'] = str(max_history)
+        self._max_history = int(max_history)
+        self.history_version += 1
+        self._save_scheduler.schedule()
     
-    def get_treeview_expanded_paths(self) -> Set[str]:
+    def get_treeview_expanded_paths(self) -> FrozenSet[str]:
         """
         Get the set of expanded directory paths in the treeview.
         
         Returns:
-            Set of directory paths that were expanded
+            Immutable set of directory paths that were expanded
         """
-        if not self.config.has_section('TreeView'):
-            return set()
-        
-        paths_str = self.config.get('TreeView', 'expanded_paths', fallback='')
-        if not paths_str:
-            return set()
-        
-        return {p.strip() for p in paths_str.split('\n') if p.strip()}
+        return self._expanded_paths
     
     def set_treeview_expanded_paths(self, paths: Set[str]) -> None:
         """
@@ -187,14 +309,8 @@ class ProjectSettings:
         Args:
             paths: Set of directory paths that are currently expanded
         """
-        if not self.config.has_section('TreeView'):
-            self.config.add_section('TreeView')
-        
-        paths_list = sorted(paths)
-        paths_str = '\n'.join(paths_list)
-        
-        self.config.set('TreeView', 'expanded_paths', paths_str)
-        self.save()
+        self._set_expanded_paths_cache(paths)
+        self._save_scheduler.schedule()
     
     @staticmethod
     def is_settings_file(filename: str) -> bool:
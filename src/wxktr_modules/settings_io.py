@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Settings I/O Helpers
+--------------------
+Shared persistence helpers for the settings classes.
+
+SaveScheduler coalesces bursts of setter calls (splitter drags, tree expansion,
+command history) into a single write once things have been quiet for a moment.
+The settings are serialized on the calling thread and written to disk by a single
+background writer thread, using write_atomic so a crash mid-write never leaves a
+truncated file behind.
+"""
+
+import os
+import sys
+import queue
+import shutil
+import tempfile
+import atexit
+import threading
+import traceback
+import weakref
+from typing import Callable, Dict
+
+
+def write_atomic(path: str, content: str) -> None:
+    """
+    Write text to path by way of a temporary file in the same directory.
+    
+    The temporary file is synced to disk and then swapped in with os.replace, so
+    readers see either the old or the new content. Set KTR_SETTINGS_NO_FSYNC=1 to
+    skip the fsync.
+    
+    Raises:
+        OSError: If the file could not be written; the original is left untouched
+    """
+    _replace_atomic(path, content, 'w', encoding='utf-8')
+
+
+def write_atomic_bytes(path: str, data: bytes) -> None:
+    """
+    Write bytes to path the same way write_atomic writes text.
+    
+    Raises:
+        OSError: If the file could not be written; the original is left untouched
+    """
+    _replace_atomic(path, data, 'wb')
+
+
+def _replace_atomic(path, data, mode, **open_kwargs) -> None:
+    directory, name = os.path.split(os.fspath(path))
+    tmp = tempfile.NamedTemporaryFile(mode, dir=directory or None, prefix=name + '.',
+                                      suffix='.tmp', delete=False, **open_kwargs)
+    try:
+        with tmp as f:
+            f.write(data)
+            f.flush()
+            if os.environ.get('KTR_SETTINGS_NO_FSYNC') != '1':
+                os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp.name)
+        os.replace(tmp.name, path)
+    except BaseException:
+        try:
+            os.remove(tmp.name)
+        except OSError:
+            pass
+        raise
+
+
+class _SettingsWriter:
+    """A single background thread that writes serialized settings to disk.
+
+    Content is queued per write callable. If a newer snapshot for the same file
+    arrives before the previous one was written, only the newest is written.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Callable[[str], None], str] = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def submit(self, write: Callable[[str], None], content: str) -> None:
+        """Queue content to be passed to write on the writer thread."""
+        with self._lock:
+            queued = write in self._pending
+            self._pending[write] = content
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="KtrSettingsWriter", daemon=True)
+                self._thread.start()
+        if not queued:
+            self._queue.put(write)
+
+    def join(self) -> None:
+        """Block until everything submitted so far has been written."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            write = self._queue.get()
+            try:
+                with self._lock:
+                    content = self._pending.pop(write)
+                write(content)
+            except Exception:
+                print("Error: Unhandled exception while writing settings:")
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+
+_writer = _SettingsWriter()
+_schedulers = weakref.WeakSet()
+
+
+def _flush_all_at_exit() -> None:
+    for scheduler in list(_schedulers):
+        scheduler.flush()
+
+
+# atexit runs handlers in reverse order: flush every live scheduler, then wait for the writer.
+atexit.register(_writer.join)
+atexit.register(_flush_all_at_exit)
+
+
+class SaveScheduler:
+    """Runs a save callback once after a burst of save requests has settled.
+
+    With a running wx app the save is deferred on the UI thread through wx.CallLater,
+    restarting the delay on every request. Without one (scripts, other threads) the
+    save is started straight away. Either way only serialization happens on the
+    calling thread; the file is written by the shared writer thread, and only if the
+    content differs from what was last saved. Pending saves are flushed at
+    interpreter exit.
+    """
+
+    def __init__(self, serialize: Callable[[], str], write: Callable[[str], None],
+                 delay_ms: int = 500):
+        """
+        Args:
+            serialize: Callable returning the settings as file content
+            write: Callable that writes that content to disk
+            delay_ms: Quiet period before a scheduled save is written
+        """
+        self._serialize = serialize
+        self._write = write
+        self._delay_ms = delay_ms
+        self._timer = None
+        self._saved_content = None
+        self.dirty = False
+        _schedulers.add(self)
+
+    def schedule(self) -> None:
+        """Mark the settings dirty and (re)start the save delay."""
+        self.dirty = True
+        wx = sys.modules.get('wx')
+        if wx is None or not wx.GetApp() or not wx.IsMainThread():
+            self.flush()
+            return
+        if self._timer is not None and self._timer.IsRunning():
+            self._timer.Start(self._delay_ms)
+        else:
+            self._timer = wx.CallLater(self._delay_ms, self.flush)
+
+    def mark_saved(self, content: str) -> None:
+        """Record content as matching what is on disk, e.g. after loading or a direct save."""
+        self._saved_content = content
+
+    def flush(self, wait: bool = False) -> None:
+        """
+        Hand a pending save to the writer thread now.
+
+        Args:
+            wait: Block until the writer thread has written it to disk
+        """
+        if self.dirty:
+            self.dirty = False
+            content = self._serialize()
+            if content != self._saved_content:
+                self._saved_content = content
+                _writer.submit(self._write, content)
+        if wait:
+            _writer.join()
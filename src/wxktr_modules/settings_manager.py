@@ -13,9 +13,48 @@ Project-specific settings (like .context files) are NOT managed here.
 import os
 import sys
 import json
-import configparser
+import functools
 from pathlib import Path
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+try:
+    from .settings_io import SaveScheduler, write_atomic
+except ImportError:
+    from settings_io import SaveScheduler, write_atomic
+
+
+def _wx_user_data_dir() -> Optional[str]:
+    """Return wx's user data directory if a wx app is running, else None."""
+    # No app can be running unless wx has been imported already.
+    wx = sys.modules.get('wx')
+    if wx is None:
+        return None
+    try:
+        if wx.GetApp():
+            return wx.StandardPaths.Get().GetUserLocalDataDir()
+    except RuntimeError:
+        pass
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def _compute_app_data_path(app_name: str) -> str:
+    """Resolve the platform-appropriate application data directory once per process."""
+    if sys.platform == "win32":
+        base_path = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+        return os.path.join(base_path, app_name)
+
+    if sys.platform == "darwin":
+        base_path = os.path.expanduser('~/Library/Application Support')
+        return os.path.join(base_path, app_name)
+
+    wx_path = _wx_user_data_dir()
+    if wx_path:
+        return wx_path
+    
+    base_path = os.environ.get('XDG_DATA_HOME', os.path.expanduser('~/.local/share'))
+    return os.path.join(base_path, app_name)
 
 
 class SettingsManager:
@@ -37,8 +76,11 @@ class SettingsManager:
         self.legacy_history_json = os.path.join(self.app_data_path, "directoryhistory.json")
         
         self.settings: Dict[str, Any] = self._get_default_settings()
+        # Setters only mark the settings dirty; the file is written once changes settle.
+        self._save_scheduler = SaveScheduler(self._serialize, self._write)
         
         self.load()
+        self._save_scheduler.mark_saved(self._serialize())
         
         self._migrate_legacy_settings()
     
@@ -48,30 +90,11 @@ class SettingsManager:
         
         Uses a consistent method to return a platform-appropriate path for storing all application data.
         """
-        app_name = self.APP_NAME
-
-        if sys.platform == "win32":
-            base_path = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
-            return os.path.join(base_path, app_name)
-
-        try:
-            import wx
-            if wx.GetApp():
-                return wx.StandardPaths.Get().GetUserLocalDataDir()
-        except (ImportError, RuntimeError):
-            pass
-        
-        if sys.platform == "darwin":
-            base_path = os.path.expanduser('~/Library/Application Support')
-            return os.path.join(base_path, app_name)
-        else:
-            base_path = os.environ.get('XDG_DATA_HOME', os.path.expanduser('~/.local/share'))
-            return os.path.join(base_path, app_name)
+        return _compute_app_data_path(self.APP_NAME)
     
     def _ensure_directory_exists(self) -> None:
         """Ensure the application data directory exists."""
-        if not os.path.exists(self.app_data_path):
-            os.makedirs(self.app_data_path)
+        os.makedirs(self.app_data_path, exist_ok=True)
     
     def _get_default_settings(self) -> Dict[str, Any]:
         """
@@ -81,6 +104,7 @@ class SettingsManager:
         """
         return {
             "version": self.SETTINGS_VERSION,
+            "legacy_migrated": False,
             
             "modules": {
                 "create": True,
@@ -121,65 +145,97 @@ class SettingsManager:
     
     def load(self) -> None:
         """Load settings from the settings file."""
-        if not os.path.exists(self.settings_file):
-            return
-        
         try:
             with open(self.settings_file, 'r', encoding='utf-8') as f:
                 loaded_settings = json.load(f)
             
             self._merge_settings(self.settings, loaded_settings)
             
+        except FileNotFoundError:
+            return
         except (json.JSONDecodeError, IOError) as e:
             print(f"Warning: Could not load settings from {self.settings_file}: {e}")
             print("Using default settings.")
     
     def _merge_settings(self, defaults: Dict, loaded: Dict) -> None:
         """
-        Recursively merge loaded settings into defaults.
+        Merge loaded settings into defaults, two levels deep.
         
         This ensures that new keys in defaults are preserved even if they
-        don't exist in the loaded settings (forward compatibility).
+        don't exist in the loaded settings (forward compatibility). Values below
+        the second level, such as the bookmarks dict, are taken from the loaded
+        settings as a whole.
         """
         for key, value in loaded.items():
-            if key in defaults:
-                if isinstance(defaults[key], dict) and isinstance(value, dict):
-                    self._merge_settings(defaults[key], value)
-                else:
-                    defaults[key] = value
+            default = defaults.get(key)
+            if isinstance(default, dict) and isinstance(value, dict):
+                defaults[key] = {**default, **value}
             else:
                 defaults[key] = value
     
     def save(self) -> None:
         """Save current settings to the settings file."""
+        content = self._serialize()
+        self._write(content)
+        self._save_scheduler.mark_saved(content)
+    
+    def _serialize(self) -> str:
+        """
+        Return the settings as JSON.
+        
+        The output is compact; set KTR_DEBUG_SETTINGS=1 to get indented output instead.
+        """
+        if os.environ.get('KTR_DEBUG_SETTINGS') == '1':
+            return json.dumps(self.settings, indent=2, ensure_ascii=False)
+        return json.dumps(self.settings, separators=(',', ':'), ensure_ascii=False)
+    
+    def _write(self, content: str) -> None:
+        """Write serialized settings to the settings file."""
         try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, indent=4, ensure_ascii=False)
+            write_atomic(self.settings_file, content)
         except IOError as e:
             print(f"Error: Could not save settings to {self.settings_file}: {e}")
     
+    def flush(self) -> None:
+        """Write any pending changes to disk now."""
+        self._save_scheduler.flush(wait=True)
+    
     def _migrate_legacy_settings(self) -> None:
         """
         Migrate settings from legacy configuration files.
         
         This method checks for old-style configuration files and migrates
         them to the new unified settings format. Only migrates if legacy
-        files exist and the new settings haven't been initialized yet.
+        files exist and no earlier migration has succeeded.
         """
+        if self.settings.get('legacy_migrated'):
+            return
+        
+        # One directory listing tells us which legacy artifacts can exist at all.
+        try:
+            with os.scandir(self.app_data_path) as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            return
+        
         migrated = False
         
-        if os.path.exists(self.legacy_browser_config):
+        browser_dir = os.path.basename(os.path.dirname(self.legacy_browser_config))
+        if browser_dir in names and os.path.isfile(self.legacy_browser_config):
             migrated |= self._migrate_browser_config()
         
-        if os.path.exists(self.legacy_history_json):
+        if os.path.basename(self.legacy_history_json) in names:
             migrated |= self._migrate_directory_history()
         
         if migrated:
             print("Migrated legacy settings to new format.")
+            self.settings['legacy_migrated'] = True
             self.save()
     
     def _migrate_browser_config(self) -> bool:
         """Migrate browser settings from legacy browser.ini file."""
+        import configparser
+        
         try:
             config = configparser.ConfigParser()
             config.read(self.legacy_browser_config)
@@ -223,22 +279,27 @@ class SettingsManager:
     def set_module_enabled(self, module_key: str, enabled: bool) -> None:
         """Set module enabled state."""
         self.settings['modules'][module_key] = enabled
-        self.save()
+        self._save_scheduler.schedule()
     
-    def get_browser_bookmarks(self) -> Dict[str, str]:
-        """Get all browser bookmarks."""
-        return self.settings['browser']['bookmarks'].copy()
+    def get_browser_bookmarks(self) -> Mapping[str, str]:
+        """
+        Get all browser bookmarks.
+        
+        Returns a read-only live view; use add_browser_bookmark and
+        remove_browser_bookmark to change it.
+        """
+        return MappingProxyType(self.settings['browser']['bookmarks'])
     
     def add_browser_bookmark(self, name: str, url: str) -> None:
         """Add a browser bookmark."""
         self.settings['browser']['bookmarks'][name] = url
-        self.save()
+        self._save_scheduler.schedule()
     
     def remove_browser_bookmark(self, name: str) -> None:
         """Remove a browser bookmark."""
         if name in self.settings['browser']['bookmarks']:
             del self.settings['browser']['bookmarks'][name]
-            self.save()
+            self._save_scheduler.schedule()
     
     def get_last_browser_url(self) -> str:
         """Get the last visited browser URL."""
@@ -247,11 +308,15 @@ class SettingsManager:
     def set_last_browser_url(self, url: str) -> None:
         """Set the last visited browser URL."""
         self.settings['browser']['last_url'] = url
-        self.save()
+        self._save_scheduler.schedule()
     
-    def get_directory_history(self) -> list:
-        """Get directory history list."""
-        return self.settings['directory_history']['directories'].copy()
+    def get_directory_history(self) -> Tuple[Dict[str, str], ...]:
+        """
+        Get directory history, most recent first.
+        
+        Returns an immutable snapshot; use the add/remove/clear methods to change it.
+        """
+        return tuple(self.settings['directory_history']['directories'])
     
     def add_directory_to_history(self, directory_path: str, timestamp: str) -> None:
         """
@@ -268,7 +333,7 @@ class SettingsManager:
         max_entries = self.settings['directory_history']['max_entries']
         self.settings['directory_history']['directories'] = history[:max_entries]
         
-        self.save()
+        self._save_scheduler.schedule()
     
     def remove_directory_from_history(self, directory_path: str) -> None:
         """Remove a directory from history."""
@@ -276,12 +341,12 @@ class SettingsManager:
         self.settings['directory_history']['directories'] = [
             e for e in history if e.get('path') != directory_path
         ]
-        self.save()
+        self._save_scheduler.schedule()
     
     def clear_directory_history(self) -> None:
         """Clear all directory history."""
         self.settings['directory_history']['directories'] = []
-        self.save()
+        self._save_scheduler.schedule()
     
     def get_window_geometry(self) -> Dict[str, Any]:
         """Get window geometry settings."""
@@ -292,7 +357,7 @@ class SettingsManager:
         self.settings['window']['width'] = width
         self.settings['window']['height'] = height
         self.settings['window']['maximized'] = maximized
-        self.save()
+        self._save_scheduler.schedule()
     
     def get_splitter_position(self, panel_name: str, splitter_name: str) -> Optional[int]:
         """Get saved splitter position for a specific panel."""
@@ -303,7 +368,7 @@ class SettingsManager:
         """Save splitter position for a specific panel."""
         key = f"{panel_name}.{splitter_name}"
         self.settings['window']['splitter_positions'][key] = position
-        self.save()
+        self._save_scheduler.schedule()
 
 
 _settings_manager: Optional[SettingsManager] = None
@@ -8,19 +8,24 @@ A centralized service for managing and running background tasks using a
 thread pool, ensuring that UI updates are safely handled on the main thread.
 """
 
+import os
 import wx
+import queue
+import threading
+import traceback
 from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Optional, Any
 
 class TaskManager:
-    """A singleton service to manage and run background tasks."""
-    _instance = None
+    """A service to manage and run background tasks. Use get_task_manager() to share one."""
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(TaskManager, cls).__new__(cls)
-            cls._instance.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="KtrWorker")
-        return cls._instance
+    def __init__(self):
+        # The worker threads are only started once the first job is submitted.
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # Finished callbacks wait here until a single CallAfter drains them all.
+        self._results = queue.SimpleQueue()
+        self._drain_pending = False
+        self._drain_lock = threading.Lock()
 
     def submit_job(self, target_function: Callable, on_complete: Optional[Callable] = None, on_error: Optional[Callable] = None, *args, **kwargs):
         """
@@ -35,6 +40,9 @@ class TaskManager:
             *args: Positional arguments for the target function.
             **kwargs: Keyword arguments for the target function.
         """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 2),
+                                               thread_name_prefix="KtrWorker")
         future = self.executor.submit(self._job_wrapper, target_function, on_complete, on_error, *args, **kwargs)
         return future
 
@@ -45,18 +53,47 @@ class TaskManager:
         try:
             result = target_function(*args, **kwargs)
             if on_complete:
-                wx.CallAfter(on_complete, result)
+                self._post(on_complete, result)
         except Exception as e:
             if on_error:
-                wx.CallAfter(on_error, e)
+                self._post(on_error, e)
             else:
-                import traceback
                 print("Unhandled exception in background task:")
                 traceback.print_exc()
 
+    def _post(self, callback: Callable, value: Any):
+        """
+        Queues a callback for the main thread.
+
+        Only the first callback queued since the last drain posts a wx.CallAfter, so
+        jobs finishing close together are delivered in one main-loop round trip.
+        """
+        self._results.put((callback, value))
+        with self._drain_lock:
+            if self._drain_pending:
+                return
+            self._drain_pending = True
+        wx.CallAfter(self._drain)
+
+    def _drain(self):
+        """Runs every queued callback on the main thread."""
+        with self._drain_lock:
+            self._drain_pending = False
+        while True:
+            try:
+                callback, value = self._results.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                callback(value)
+            except Exception:
+                print("Unhandled exception in task callback:")
+                traceback.print_exc()
+
     def shutdown(self, wait=True):
         """Shuts down the thread pool."""
-        self.executor.shutdown(wait=wait)
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
 
 _task_manager: Optional[TaskManager] = None
 
@@ -3,14 +3,83 @@
 
 import wx
 import wx.html2
-import os
+import re
 import sys
-from urllib.parse import urlparse, parse_qs, quote, unquote
+import functools
+from urllib.parse import quote, unquote
 
 from .settings_manager import get_settings_manager
+from .task_manager import get_task_manager
 
 HOME_URL = "about:home"
 REMOVE_SCHEME = "app-remove-bookmark"
+REMOVE_SCHEME_URL_PREFIX = f"{REMOVE_SCHEME}://"
+
+# Escapes text for HTML content and quoted attribute values in one pass.
+_HTML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'})
+
+_HOMEPAGE_CSS_RAW = """
+    body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif; margin: 40px; background-color: #f0f2f5; color: #333; }
+    h1 { color: #1c1e21; }
+    .bookmarks-list { list-style: none; padding: 0; max-width: 600px; margin: 20px auto; }
+    .bookmark-item { 
+        display: flex; 
+        align-items: stretch; 
+        justify-content: space-between; 
+        margin: 10px 0; 
+        background-color: #fff; 
+        border-radius: 8px; 
+        box-shadow: 0 1px 3px rgba(0,0,0,0.12);
+        overflow: hidden;
+    }
+    .bookmark-link { 
+        text-decoration: none; 
+        color: #007bff; 
+        font-size: 1.1em;
+        padding: 15px;
+        display: flex;
+        align-items: center;
+        flex-grow: 1;
+        flex-shrink: 1;
+        min-width: 0;
+        transition: background-color 0.2s;
+    }
+    .bookmark-link:hover { background-color: #f8f9fa; }
+    .remove-btn {
+        text-decoration: none;
+        color: #dc3545;
+        font-size: 0.9em;
+        padding: 15px;
+        display: flex;
+        align-items: center;
+        flex-shrink: 0;
+        white-space: nowrap;
+        border-left: 1px solid #eee;
+        transition: background-color 0.2s;
+    }
+    .remove-btn:hover { background-color: #f1f1f1; }
+"""
+
+# Minified once at import; the homepage is assembled around the bookmark list.
+_HOMEPAGE_CSS = re.sub(r'\s*([{};:,])\s*', r'\1', re.sub(r'\s+', ' ', _HOMEPAGE_CSS_RAW).strip())
+_HOMEPAGE_HEAD = (f"<html><head><title>Home</title><style>{_HOMEPAGE_CSS}</style></head>"
+                  "<body><h1>Bookmarks</h1><div class='bookmarks-list'>")
+_HOMEPAGE_TAIL = "</div></body></html>"
+
+
+def _render_homepage_html(bookmarks):
+    """Renders the homepage HTML for the given bookmarks. Safe to run off the UI thread."""
+    parts = [_HOMEPAGE_HEAD]
+    append = parts.append
+    url_quote = quote
+    escape = _HTML_ESCAPE
+    remove_prefix = f'{REMOVE_SCHEME_URL_PREFIX}remove?name='
+    for name, url in bookmarks.items():
+        append(f"<div class='bookmark-item'>"
+               f"<a href='{url.translate(escape)}' class='bookmark-link'>{name.translate(escape)}</a>"
+               f"<a href='{remove_prefix}{url_quote(name)}' class='remove-btn'>Remove</a></div>")
+    append(_HOMEPAGE_TAIL)
+    return "".join(parts)
 
 class BrowserPanel(wx.Panel):
     """A wx.Panel that provides a simple web browser using wx.html2.WebView."""
@@ -23,77 +92,13 @@ class BrowserPanel(wx.Panel):
         self._initialize_ui()
         self._bind_events()
         self.first_load_done = False
-
-    def _generate_homepage_html(self):
-        """Generates the HTML for the homepage with bookmarks and remove buttons."""
-        bookmarks = self.settings.get_browser_bookmarks()
-        
-        bookmarks_html = ""
-        for name, url in bookmarks.items():
-            encoded_name = quote(name)
-            remove_link = f'{REMOVE_SCHEME}://remove?name={encoded_name}'
-            bookmarks_html += f"""
-            <div class='bookmark-item'>
-                <a href='{url}' class='bookmark-link'>{name}</a>
-                <a href='{remove_link}' class='remove-btn'>Remove</a>
-            </div>
-            """
-
-        html_content = f"""
-        <html>
-        <head>
-            <title>Home</title>
-            <style>
-                body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif; margin: 40px; background-color: #f0f2f5; color: #333; }}
-                h1 {{ color: #1c1e21; }}
-                .bookmarks-list {{ list-style: none; padding: 0; max-width: 600px; margin: 20px auto; }}
-                .bookmark-item {{ 
-                    display: flex; 
-                    align-items: stretch; 
-                    justify-content: space-between; 
-                    margin: 10px 0; 
-                    background-color: #fff; 
-                    border-radius: 8px; 
-                    box-shadow: 0 1px 3px rgba(0,0,0,0.12);
-                    overflow: hidden;
-                }}
-                .bookmark-link {{ 
-                    text-decoration: none; 
-                    color: #007bff; 
-                    font-size: 1.1em;
-                    padding: 15px;
-                    display: flex;
-                    align-items: center;
-                    flex-grow: 1;
-                    flex-shrink: 1;
-                    min-width: 0;
-                    transition: background-color 0.2s;
-                }}
-                .bookmark-link:hover {{ background-color: #f8f9fa; }}
-                .remove-btn {{
-                    text-decoration: none;
-                    color: #dc3545;
-                    font-size: 0.9em;
-                    padding: 15px;
-                    display: flex;
-                    align-items: center;
-                    flex-shrink: 0;
-                    white-space: nowrap;
-                    border-left: 1px solid #eee;
-                    transition: background-color 0.2s;
-                }}
-                .remove-btn:hover {{ background-color: #f1f1f1; }}
-            </style>
-        </head>
-        <body>
-            <h1>Bookmarks</h1>
-            <div class='bookmarks-list'>
-                {bookmarks_html}
-            </div>
-        </body>
-        </html>
-        """
-        return html_content
+        # Rendered homepage; cleared whenever a bookmark is added or removed.
+        self._home_html_cache = None
+        # Whether the page shown may differ from the current bookmarks.
+        self._home_html_dirty = True
+        # Bumped on every bookmark change so a render of older bookmarks is discarded.
+        self._home_generation = 0
+        self._home_render_pending = False
 
     def _initialize_ui(self):
         nav_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -148,7 +153,8 @@ class BrowserPanel(wx.Panel):
     def on_refresh(self, event):
         """Handles the 'Refresh' button click."""
         if self.url_bar.GetValue() == HOME_URL:
-            self.load_url(HOME_URL)
+            if self._home_html_dirty:
+                self.load_url(HOME_URL)
         else:
             self.browser.Reload()
 
@@ -163,7 +169,8 @@ class BrowserPanel(wx.Panel):
             wx.MessageBox("Cannot bookmark the homepage or an empty URL.", "Info", wx.OK | wx.ICON_INFORMATION)
             return
 
-        dlg = wx.TextEntryDialog(self, "Enter a name for this bookmark:", "Add Bookmark", os.path.basename(current_url.strip('/')))
+        default_name = current_url.rstrip('/').rpartition('/')[2] or current_url
+        dlg = wx.TextEntryDialog(self, "Enter a name for this bookmark:", "Add Bookmark", default_name)
         if dlg.ShowModal() == wx.ID_OK:
             name = dlg.GetValue()
             if name:
@@ -173,6 +180,7 @@ class BrowserPanel(wx.Panel):
     def _save_bookmark(self, name, url):
         """Saves a single bookmark using the settings manager."""
         self.settings.add_browser_bookmark(name, url)
+        self._invalidate_homepage()
         
         if self.url_bar.GetValue() == HOME_URL:
             self.load_url(HOME_URL)
@@ -180,46 +188,97 @@ class BrowserPanel(wx.Panel):
     def on_navigating(self, event):
         """Event handler that fires before a URL is loaded."""
         url = event.GetURL()
-        if url.startswith(f'{REMOVE_SCHEME}://'):
+        if url.startswith(REMOVE_SCHEME_URL_PREFIX):
             event.Veto()
-            parsed_url = urlparse(url)
-            query = parse_qs(parsed_url.query)
-            bookmark_name_encoded = query.get('name', [None])[0]
-            if bookmark_name_encoded:
-                bookmark_name = unquote(bookmark_name_encoded)
-                self._remove_bookmark(bookmark_name)
+            # Only the 'name' parameter matters; pick it out without a full URL parse.
+            query = url.partition('?')[2].partition('#')[0]
+            for param in query.split('&'):
+                key, _, bookmark_name_encoded = param.partition('=')
+                if key == 'name':
+                    if bookmark_name_encoded:
+                        self._remove_bookmark(unquote(bookmark_name_encoded))
+                    break
         else:
             event.Skip()
 
     def _remove_bookmark(self, name):
         """Removes a bookmark and refreshes the homepage."""
         self.settings.remove_browser_bookmark(name)
+        self._invalidate_homepage()
         self.load_url(HOME_URL)
 
     def on_navigated(self, event):
         """Event handler that fires after a URL has been loaded."""
         current_url = event.GetURL()
-        if not current_url.startswith(f'{REMOVE_SCHEME}://'):
+        if not current_url.startswith(REMOVE_SCHEME_URL_PREFIX):
              self.url_bar.SetValue(current_url)
+             # Links, back/forward and redirects replace the homepage too. SetPage() itself
+             # reports about:blank (or nothing), which is the homepage still being shown.
+             if current_url and current_url not in (HOME_URL, "about:blank"):
+                 self._home_html_dirty = True
 
     def on_error(self, event):
         """Event handler for WebView errors."""
         url = event.GetURL()
-        if not url.startswith(f'{REMOVE_SCHEME}://'):
+        if not url.startswith(REMOVE_SCHEME_URL_PREFIX):
             wx.LogError(f"WebView Error: URL '{url}' could not be loaded.")
 
     def load_url(self, url):
         """Loads a given URL or the homepage."""
         if url == HOME_URL:
-            html = self._generate_homepage_html()
-            self.browser.SetPage(html, "")
             self.url_bar.SetValue(HOME_URL)
+            if self._home_html_cache is not None:
+                self._show_homepage(self._home_html_cache)
+            elif not self._home_render_pending:
+                # Render from a snapshot on a worker; repeated requests share one render.
+                self._home_render_pending = True
+                bookmarks = dict(self.settings.get_browser_bookmarks())
+                get_task_manager().submit_job(
+                    _render_homepage_html,
+                    functools.partial(self._on_homepage_rendered, self._home_generation),
+                    self._on_homepage_render_failed,
+                    bookmarks
+                )
         else:
             if "://" not in url:
                 url = f"https://{url}"
             self.browser.LoadURL(url)
+            self._home_html_dirty = True
             self.url_bar.SetValue(url)
 
+    def _invalidate_homepage(self):
+        """Drops the rendered homepage after the bookmarks changed."""
+        self._home_html_cache = None
+        self._home_html_dirty = True
+        self._home_generation += 1
+
+    def _show_homepage(self, html):
+        """Displays the rendered homepage."""
+        self.browser.SetPage(html, "")
+        self._home_html_dirty = False
+
+    def _on_homepage_rendered(self, generation, html):
+        """Caches a finished homepage render and shows it if the homepage is still wanted."""
+        if not self:
+            return
+        self._home_render_pending = False
+        wanted = self.url_bar.GetValue() == HOME_URL
+        if generation != self._home_generation:
+            # Bookmarks changed while rendering; start over with the current ones.
+            if wanted:
+                self.load_url(HOME_URL)
+            return
+        self._home_html_cache = html
+        if wanted:
+            self._show_homepage(html)
+
+    def _on_homepage_render_failed(self, error):
+        """Reports a failed homepage render."""
+        if not self:
+            return
+        self._home_render_pending = False
+        wx.LogError(f"Could not render the homepage: {error}")
+
     def load_last_session(self):
         """Loads the last URL from the settings manager."""
         url = self.settings.get_last_browser_url()
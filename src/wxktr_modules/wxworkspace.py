@@ -703,6 +703,7 @@ class WorkspacePanel(wx.Panel):
                 return False
 
         self.save_treeview_state()
+        self.project_settings.flush()
         return True
 
 